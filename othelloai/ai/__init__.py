@@ -4,6 +4,7 @@ import enum
 
 from .minmax import MinmaxAIPlayer
 from .random import RandomAIPlayer
+from .smp import ParallelMinmaxAIPlayer
 
 
 class AIOption(enum.Enum):
@@ -11,10 +12,12 @@ class AIOption(enum.Enum):
 
     Randy = enum.auto()
     Marty = enum.auto()
+    Polly = enum.auto()
 
 
 ai_default = AIOption.Randy
 ai_options = {
     AIOption.Randy: RandomAIPlayer,
     AIOption.Marty: MinmaxAIPlayer,
+    AIOption.Polly: ParallelMinmaxAIPlayer,
 }
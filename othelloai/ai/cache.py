@@ -0,0 +1,186 @@
+"""
+Persistent analysis cache.
+
+Search results are stored in a local SQLite database keyed by position so that
+they survive the game and process that computed them. Symmetric positions
+share a key, so a result serves all eight orientations of a position. Keys
+are prefixed with a tag naming the search configuration when one is given, so
+that searches whose results differ for the same depth never share entries. The
+database runs in WAL mode so that many processes can read and write it
+concurrently. Writes are buffered and committed in batches, and the least
+recently used positions are evicted once the cache grows beyond its capacity.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Optional, Union
+
+from .. import bitboard as bb
+from ..bitboard import Position
+from ..board import Board, CompactBoard
+
+_logger = logging.getLogger(__name__)
+
+CachedResult = namedtuple("CachedResult", "depth, score, move", module=__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis (
+    position BLOB PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    move INTEGER,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS analysis_last_used ON analysis (last_used);
+"""
+
+_UPSERT = """
+INSERT INTO analysis (position, depth, score, move, last_used)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (position) DO UPDATE SET
+    depth = excluded.depth,
+    score = excluded.score,
+    move = excluded.move,
+    last_used = excluded.last_used
+WHERE excluded.depth >= analysis.depth
+"""
+
+
+def position_key(board: Board, tag: str = "") -> bytes:
+    """Return the key of the position of `board` in a cache tagged `tag`."""
+    return _canonical_key(board, tag)[0]
+
+
+def _canonical_key(board: Board, tag: str = "") -> tuple[bytes, int]:
+    """Return the key of `board` and the transform from it to the key."""
+    # Symmetric positions share an entry, with moves stored in the orientation
+    # of the canonical position
+    canonical, transform = CompactBoard.from_board(board).canonical()
+    key = canonical.to_bytes()
+    if tag:
+        key = tag.encode() + b"\0" + key
+    return key, transform
+
+
+class AnalysisCache:
+    """Cache of the deepest search result for each position."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: int = 1_000_000,
+        batch_size: int = 64,
+        timeout: float = 30.0,
+        tag: str = "",
+    ):
+        """
+        Open or create the cache at `path`.
+
+        Buffered results are committed once `batch_size` of them accumulate.
+        timeout is how long to wait in seconds for another process to release
+        its lock on the database. Results are only shared with caches opened
+        with the same `tag`.
+        """
+        self._tag = tag
+        self._max_entries = max_entries
+        self._batch_size = batch_size
+        self._pending: dict[bytes, tuple] = {}
+        self._touched: set[bytes] = set()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def get(self, board: Board) -> Optional[CachedResult]:
+        """Return the cached result for `board` or None if there is none."""
+        key, transform = _canonical_key(board, self._tag)
+        with self._lock:
+            row = self._pending.get(key)
+            if row is None:
+                row = self._connection.execute(
+                    "SELECT depth, score, move FROM analysis WHERE position = ?",
+                    (key,),
+                ).fetchone()
+            if row is not None:
+                self._touched.add(key)
+        if row is None:
+            return None
+        depth, score, square = row[:3]
+        move = None
+        if square is not None:
+            move = bb.transform_position(
+                Position(*divmod(square, 8)), bb.INVERSE_TRANSFORMS[transform]
+            )
+        return CachedResult(depth, score, move)
+
+    def store(self, board: Board, depth: int, score: int, move: Optional[Position]):
+        """Buffer a result for `board`, keeping only the deepest one."""
+        key, transform = _canonical_key(board, self._tag)
+        square = None
+        if move is not None:
+            move = bb.transform_position(move, transform)
+            square = move.row * 8 + move.col
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None or pending[0] <= depth:
+                self._pending[key] = (depth, score, square, time.time())
+            if len(self._pending) >= self._batch_size:
+                self._flush()
+
+    def flush(self):
+        """Commit buffered results."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending and not self._touched:
+            return
+        # An immediate transaction takes the write lock up front so that
+        # concurrent writers wait on the busy timeout instead of deadlocking
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            self._connection.executemany(
+                "UPDATE analysis SET last_used = ? WHERE position = ?",
+                ((now, key) for key in self._touched - self._pending.keys()),
+            )
+            self._connection.executemany(
+                _UPSERT, ((key, *row) for key, row in self._pending.items())
+            )
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM analysis"
+            ).fetchone()
+            if count > self._max_entries:
+                self._connection.execute(
+                    "DELETE FROM analysis WHERE position IN ("
+                    " SELECT position FROM analysis ORDER BY last_used LIMIT ?)",
+                    (count - self._max_entries,),
+                )
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+        _logger.debug("Committed %d cached results", len(self._pending))
+        self._pending.clear()
+        self._touched.clear()
+
+    def close(self):
+        """Commit buffered results and close the cache."""
+        with self._lock:
+            self._flush()
+            self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            self._flush()
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM analysis"
+            ).fetchone()
+        return count
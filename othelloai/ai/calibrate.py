@@ -0,0 +1,122 @@
+"""
+Fit Multi-ProbCut parameters from game records.
+
+Every position of every game in the record files is searched at each deep and
+shallow depth with a full-width search. A linear model predicting the deep
+score from the shallow score is fitted for each (deep, shallow) depth pair.
+Records should come from games between engines so that the positions are
+those the search meets in play. Positions the deepest search solves to the end
+of the game are skipped, since selective search is not used there.
+
+Usage: python -m othelloai.ai.calibrate RECORDS... -o probcut.json
+"""
+
+import logging
+from argparse import ArgumentParser
+from itertools import islice
+from math import sqrt
+from pathlib import Path
+from typing import Iterable, Optional
+
+from ..board import Board
+from ..color import Color
+from ..record import read_records, replay
+from .minmax import MinmaxAIPlayer
+from .probcut import Cut, ProbCutParams
+
+_logger = logging.getLogger(__name__)
+
+
+def default_pairs(depths: Iterable[int]) -> list[tuple[int, int]]:
+    """Return the (deep, shallow) depth pairs fitted for `depths` by default."""
+    pairs = []
+    for depth in depths:
+        for reduction in (2, 4):
+            if depth - reduction >= 1:
+                pairs.append((depth, depth - reduction))
+    return pairs
+
+
+def fit_cut(shallow_depth: int, xs: list[int], ys: list[int]) -> Cut:
+    """Fit ``ys = slope * xs + intercept`` by least squares."""
+    n = len(xs)
+    assert n == len(ys) and n > 1, "At least two samples are required"
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    slope = sxy / sxx if sxx else 1.0
+    intercept = mean_y - slope * mean_x
+    residuals = [y - (slope * x + intercept) for x, y in zip(xs, ys)]
+    sigma = sqrt(sum(r * r for r in residuals) / (n - 1))
+    return Cut(shallow_depth, slope, intercept, sigma)
+
+
+def fit(
+    boards: Iterable[Board],
+    pairs: list[tuple[int, int]],
+    threshold: float = 1.5,
+) -> ProbCutParams:
+    """Fit cut parameters for each (deep, shallow) pair over `boards`."""
+    depths = sorted({depth for pair in pairs for depth in pair})
+    scores = {depth: [] for depth in depths}
+    for i, board in enumerate(boards):
+        if board.empty_cells().bit_count() <= depths[-1]:
+            continue
+        for depth in depths:
+            # A fresh player for each search keeps deeper results in its table
+            # from standing in for shallow scores
+            player = MinmaxAIPlayer(Color.black, 0)
+            scores[depth].append(player.search(board, depth))
+        _logger.debug("Searched position %d", i)
+
+    cuts = {}
+    for deep, shallow in pairs:
+        cut = fit_cut(shallow, scores[shallow], scores[deep])
+        cuts.setdefault(deep, []).append(cut)
+        _logger.info("Depth %d from %d: %s", deep, shallow, cut)
+    return ProbCutParams(cuts, threshold)
+
+
+def record_positions(paths: Iterable[Path], every: int = 1) -> Iterable[Board]:
+    """Yield every `every`th position of the games in the record files."""
+    for path in paths:
+        for moves in read_records(path):
+            yield from islice(replay(moves), 0, None, every)
+
+
+def main(argv: Optional[list[str]] = None):
+    """Entry point of the calibration tool."""
+    parser = ArgumentParser(description="Fit Multi-ProbCut parameters")
+    parser.add_argument("records", nargs="+", type=Path, help="Game record files")
+    parser.add_argument(
+        "-o", "--output", type=Path, required=True, help="Parameter file to write"
+    )
+    parser.add_argument(
+        "-d",
+        "--depths",
+        type=int,
+        nargs="+",
+        default=[3, 4, 5, 6],
+        help="Deep search depths to calibrate",
+    )
+    parser.add_argument(
+        "-t", "--threshold", type=float, default=1.5, help="Cut threshold in sigmas"
+    )
+    parser.add_argument(
+        "--every", type=int, default=1, help="Only sample every nth position"
+    )
+    parser.add_argument(
+        "--max-positions", type=int, default=None, help="Limit the sample size"
+    )
+    args = parser.parse_args(argv)
+
+    boards = islice(record_positions(args.records, args.every), args.max_positions)
+    params = fit(boards, default_pairs(args.depths), args.threshold)
+    params.save(args.output)
+
+
+if __name__ == "__main__":
+    logging.basicConfig()
+    _logger.setLevel(logging.INFO)
+    main()
@@ -1,53 +1,373 @@
 """Minmax AI implementation."""
 
 import threading
+import time
+import weakref
 from math import inf
-from typing import Optional
+from pathlib import Path
+from typing import Optional, Union
 
 from ..bitboard import Position
 from ..board import Board
-from ..color import Color, opposite_color
+from ..clock import allocate_time
+from ..color import Color
+from ..exception import PlayerInterrupted
 from ..player import Player
+from .cache import AnalysisCache
+from .network import NetworkEvaluator
+from .ordering import MoveOrderer
+from .probcut import DEFAULT_PARAMS, ProbCutParams
+from .table import Bound, TranspositionTable
+
+# Late-move reductions only apply to moves after the first few at a node and
+# with enough remaining depth for the reduced search to be meaningful
+LMR_FULL_DEPTH_MOVES = 3
+LMR_MIN_DEPTH = 3
+LMR_REDUCTION = 1
+# Interrupts and the clock are checked every few nodes rather than every node
+INTERRUPT_CHECK_NODES = 32
+
+
+class _OutOfTime(Exception):
+    """Raised when a search runs past the time allocated to the move."""
 
 
 class MinmaxAIPlayer(Player):
-    """Player that uses the minmax algorithm to make moves."""
+    """
+    Player that uses the minmax algorithm to make moves.
+
+    Minmax is implemented as an iteratively deepened negamax search with
+    alpha-beta pruning. Moves are ordered by `MoveOrderer` unless `ordering`
+    is disabled, results are kept in a transposition table unless `tt` is
+    disabled, and both tables persist between moves in a game. The selective
+    search options `probcut` and `lmr` enable Multi-ProbCut and late-move
+    reductions respectively. Results are shared across games and processes
+    through an `AnalysisCache` at `cache_path` if one is given. Only players
+    whose options give the same results share entries, and the cache is closed
+    when the player is garbage collected. A shared `table` may be passed in
+    place of the player's own transposition table. Under a time control,
+    iterations stop before `depth` once the time allocated to the move runs
+    out.
 
-    def __init__(self, color: Color, depth: int, **kwargs):
+    Positions are scored by disc difference unless `network` names the weights
+    of a `NetworkEvaluator`. The network evaluates the children of a node one
+    ply from the horizon together, apart from children that pass or end the
+    game.
+
+    A search stops at the last depth it completed within `max_nodes` nodes if
+    a limit is given, which unlike time limits gives reproducible results.
+    Selective search is turned off in subtrees searched to the end of the
+    game, so that solved scores stay exact.
+    """
+
+    def __init__(
+        self,
+        color: Color,
+        depth: int,
+        probcut: bool = False,
+        lmr: bool = False,
+        probcut_params: Optional[ProbCutParams] = None,
+        ordering: bool = True,
+        tt: bool = True,
+        cache_path: Optional[Union[str, Path]] = None,
+        table: Optional[TranspositionTable] = None,
+        network: Optional[Union[str, Path]] = None,
+        max_nodes: Optional[int] = None,
+        **kwargs,
+    ):
         super().__init__(color, **kwargs)
         self._depth = depth
+        self._probcut = probcut
+        self._probcut_params = (
+            probcut_params if probcut_params is not None else DEFAULT_PARAMS
+        )
+        self._lmr = lmr
+        self._orderer = MoveOrderer() if ordering else None
+        self._table: Optional[TranspositionTable] = None
+        if tt:
+            self._table = table if table is not None else TranspositionTable()
+        self._network = NetworkEvaluator.load(network) if network is not None else None
+        self._max_nodes = max_nodes
+        self._cache = None
+        if cache_path is not None:
+            self._cache = AnalysisCache(cache_path, tag=self._search_tag())
+            weakref.finalize(self, self._cache.close)
+        # Plies played since the last search, counted from turn changes
+        self._plies_since_search: Optional[int] = None
+        self._interrupt: Optional[threading.Event] = None
+        self._deadline: Optional[float] = None
+        # Number of positions visited by the last search
+        self.nodes = 0
+        # Depth of the deepest iteration the last search completed
+        self.completed_depth = 0
 
     def _get_move(self, board: Board, interrupt: threading.Event) -> Position:
-        _, best_move = self._find_best_move(board, self._depth)
+        empties = board.empty_cells().bit_count()
+        if self._orderer is not None and self._plies_since_search is not None:
+            self._orderer.advance(self._plies_since_search)
+        self._plies_since_search = 0
+        self._interrupt = interrupt
+        if self.clock is not None:
+            self._deadline = time.monotonic() + allocate_time(self.clock, empties)
+        try:
+            _, best_move = self._find_best_move(board, self._depth)
+        finally:
+            self._interrupt = None
+            self._deadline = None
         return best_move
 
-    def _evaluate_state(self, state: Board) -> int:
-        my_pieces = state.white if self.color == Color.white else state.black
-        opponent_pieces = state.black if self.color == Color.white else state.white
-        return my_pieces.bit_count() - opponent_pieces.bit_count()
+    def _on_turn_change(self, color: Color):
+        # Every move or pass changes the turn, while passes leave the number
+        # of empty squares unchanged
+        if self._plies_since_search is not None:
+            self._plies_since_search += 1
+
+    def _on_game_over(self, color: Optional[Color], board: Board):
+        if self._cache is not None:
+            self._cache.flush()
+
+    def _search_tag(self) -> str:
+        """Return the tag of the options that change search results."""
+        # Ordering and the transposition table only change how fast the same
+        # scores are found, so they are left out
+        options = []
+        if self._probcut:
+            options.append(f"probcut={self._probcut_params.fingerprint()}")
+        if self._lmr:
+            options.append("lmr")
+        if self._network is not None:
+            options.append(f"network={self._network.fingerprint()}")
+        if self._max_nodes is not None:
+            options.append(f"max_nodes={self._max_nodes}")
+        return ",".join(options)
+
+    def _evaluate_state(self, state: Board) -> float:
+        """Return the score of `state` from the perspective of its turn player."""
+        if self._network is not None:
+            return self._network.evaluate([state])[0]
+        return _disc_difference(state)
+
+    def analyze(self, board: Board, depth: int) -> (int, Optional[Position]):
+        """Return the score and best move of `board` searched to `depth`."""
+        return self._find_best_move(board, depth)
+
+    def search(
+        self, board: Board, depth: int, alpha: float = -inf, beta: float = inf
+    ) -> int:
+        """Return the score of `board` for its turn player searched to `depth`."""
+        self.nodes = 0
+        return self._search(board.copy(), depth, alpha, beta, 0)
 
     def _find_best_move(self, board: Board, depth: int) -> (int, Optional[Position]):
-        current_score = self._evaluate_state(board)
+        self.nodes = 1
+        self.completed_depth = 0
         potential_moves = board.valid_moves()
         if not potential_moves or depth == 0:
-            return current_score, None
+            return self._evaluate_state(board), None
+        if self._cache is not None:
+            cached = self._cache.get(board)
+            if cached is not None and cached.depth >= depth:
+                self.completed_depth = cached.depth
+                return cached.score, cached.move
 
-        best_move = potential_moves[0]
-        best_score = -inf
+        # Shallower iterations fill the tables that order the deeper ones and
+        # leave a move to play if time runs out
+        timed = self._deadline is not None
+        limited = timed or self._max_nodes is not None
+        first_depth = 1 if self._orderer is not None or limited else depth
+        started_at = time.monotonic()
+        best_score, best_move = self._evaluate_state(board), potential_moves[0]
+        completed_depth = 0
+        for iteration_depth in range(first_depth, depth + 1):
+            try:
+                best_score, best_move = self._search_root(
+                    board, potential_moves, iteration_depth, best_move
+                )
+            except _OutOfTime:
+                break
+            completed_depth = self.completed_depth = iteration_depth
+            # The next iteration takes longer than all before it together
+            now = time.monotonic()
+            if timed and now + (now - started_at) > self._deadline:
+                break
+
+        if self._cache is not None and completed_depth:
+            self._cache.store(board, completed_depth, best_score, best_move)
+        return best_score, best_move
+
+    def _search_root(
+        self,
+        board: Board,
+        potential_moves: list[Position],
+        depth: int,
+        pv_move: Position,
+    ) -> (int, Position):
+        # Moves are made and taken back on one board, which an interrupted
+        # search leaves partway down a line, so the caller's board is copied
+        board = board.copy()
         color = board.turn_player_color
-        for move in potential_moves:
-            initial_state = board.copy()
+        best_move = pv_move
+        alpha = -inf
+        for move in self._ordered(board, potential_moves, 0, depth, pv_move):
+            flips = board.place(color, move)
+            board.swap_turn_players()
+            score = -self._search(board, depth - 1, -inf, -alpha, 1)
+            board.swap_turn_players()
+            board.undo(color, move, flips)
+            if score > alpha:
+                alpha = score
+                best_move = move
 
-            board.place(color, move)
-            board.turn_player_color = opposite_color(color)
+        if self._table is not None:
+            self._table.store(board, depth, alpha, Bound.exact, best_move)
+        return alpha, best_move
 
-            opponent_best_score, _ = self._find_best_move(board, depth - 1)
-            current_score = -opponent_best_score
+    def _search(
+        self, board: Board, depth: int, alpha: float, beta: float, ply: int
+    ) -> int:
+        self.nodes += 1
+        if self.nodes % INTERRUPT_CHECK_NODES == 0:
+            if self._interrupt is not None and self._interrupt.is_set():
+                raise PlayerInterrupted
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                raise _OutOfTime
+            if self._max_nodes is not None and self.nodes >= self._max_nodes:
+                raise _OutOfTime
+        if board.must_pass():
+            if board.is_game_over():
+                return _disc_difference(board)
+            board.swap_turn_players()
+            score = -self._search(board, depth, -beta, -alpha, ply + 1)
+            board.swap_turn_players()
+            return score
+        if depth == 0:
+            return self._evaluate_state(board)
+
+        potential_moves = board.valid_moves()
+        original_alpha = alpha
+        entry = self._table.get(board) if self._table is not None else None
+        tt_move = None
+        if entry is not None:
+            tt_move = entry.move
+            if entry.depth >= depth:
+                if entry.bound is Bound.exact:
+                    return entry.score
+                elif entry.bound is Bound.lower:
+                    alpha = max(alpha, entry.score)
+                else:
+                    beta = min(beta, entry.score)
+                if alpha >= beta:
+                    return entry.score
+
+        # Reductions would make the scores of solved subtrees inexact
+        selective = depth < board.empty_cells().bit_count()
+        if self._probcut and selective:
+            cut_score = self._probcut_score(board, depth, alpha, beta, ply)
+            if cut_score is not None:
+                return cut_score
+
+        best_score = -inf
+        best_move = None
+        color = board.turn_player_color
+        moves = self._ordered(board, potential_moves, ply, depth, tt_move)
+        if depth == 1 and self._network is not None:
+            # Children are evaluated together rather than searched one by one,
+            # except those that pass or end the game, which are searched so
+            # that finished games are scored exactly
+            leaves = [(move, _play(board, move)) for move in moves]
+            moves = [move for move, child in leaves if child.must_pass()]
+            leaves = [(move, child) for move, child in leaves if not child.must_pass()]
+            if leaves:
+                scores = self._network.evaluate([child for _, child in leaves])
+                self.nodes += len(leaves)
+                for (move, _), score in zip(leaves, scores):
+                    if -score > best_score:
+                        best_score = -score
+                        best_move = move
+                alpha = max(alpha, best_score)
+                if alpha >= beta:
+                    moves = []
+        for i, move in enumerate(moves):
+            flips = board.place(color, move)
+            board.swap_turn_players()
+            if (
+                self._lmr
+                and selective
+                and depth >= LMR_MIN_DEPTH
+                and i >= LMR_FULL_DEPTH_MOVES
+            ):
+                # Late moves are searched shallower with a null window and only
+                # re-searched at full depth if they might raise alpha
+                reduced_depth = depth - 1 - LMR_REDUCTION
+                score = -self._search(board, reduced_depth, -alpha - 1, -alpha, ply + 1)
+                if score > alpha:
+                    score = -self._search(board, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                score = -self._search(board, depth - 1, -beta, -alpha, ply + 1)
+            board.swap_turn_players()
+            board.undo(color, move, flips)
 
-            if current_score > best_score:
-                best_score = current_score
+            if score > best_score:
+                best_score = score
                 best_move = move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                if self._orderer is not None:
+                    self._orderer.record_cutoff(color, move, ply, depth)
+                break
 
-            board = initial_state
+        if best_score <= original_alpha:
+            bound = Bound.upper
+        elif best_score >= beta:
+            bound = Bound.lower
+        else:
+            bound = Bound.exact
+        if self._table is not None:
+            self._table.store(board, depth, best_score, bound, best_move)
+        return best_score
 
-        return best_score, best_move
+    def _ordered(
+        self,
+        board: Board,
+        potential_moves: list[Position],
+        ply: int,
+        depth: int,
+        tt_move: Optional[Position],
+    ) -> list[Position]:
+        """Return `potential_moves` in search order."""
+        if self._orderer is None:
+            return potential_moves
+        return self._orderer.order(board, potential_moves, ply, depth, tt_move)
+
+    def _probcut_score(
+        self, board: Board, depth: int, alpha: float, beta: float, ply: int
+    ) -> Optional[float]:
+        """Return a bound if shallow searches predict a cutoff, otherwise None."""
+        threshold = self._probcut_params.threshold
+        for cut in self._probcut_params.cuts_for(depth):
+            margin = threshold * cut.sigma
+            if beta < inf:
+                bound = round((beta + margin - cut.intercept) / cut.slope)
+                score = self._search(board, cut.shallow_depth, bound - 1, bound, ply)
+                if score >= bound:
+                    return beta
+            if alpha > -inf:
+                bound = round((alpha - margin - cut.intercept) / cut.slope)
+                score = self._search(board, cut.shallow_depth, bound, bound + 1, ply)
+                if score <= bound:
+                    return alpha
+        return None
+
+
+def _disc_difference(board: Board) -> int:
+    """Return the disc difference of `board` for its turn player."""
+    difference = board.white.bit_count() - board.black.bit_count()
+    return difference if board.turn_player_color is Color.white else -difference
+
+
+def _play(board: Board, move: Position) -> Board:
+    """Return a copy of `board` after its turn player plays `move`."""
+    child = board.copy()
+    child.place(child.turn_player_color, move)
+    child.swap_turn_players()
+    return child
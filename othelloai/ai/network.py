@@ -0,0 +1,123 @@
+"""
+Neural network position evaluation.
+
+A small multilayer perceptron scores positions for the player to move. Its
+inputs are the white and black bitboards unpacked into two planes of 64 cells
+from a1 to h8, followed by 1 if white is to move and 0 otherwise. Hidden
+layers use ReLU and the single output is the predicted final disc difference.
+
+Weights are stored in a ``.npz`` file holding arrays ``w0, b0, w1, b1, ...``
+for each layer in order. Positions are evaluated in batches so that many of
+them share each matrix multiply.
+
+Evaluation requires NumPy, which is installed with the ``network`` extra.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+from ..board import Board
+from ..color import Color
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+N_INPUTS = 129
+
+
+def features(boards: Sequence[Board]) -> "np.ndarray":
+    """Return the network inputs of `boards`, one row per board."""
+    bitboards = np.array([(board.white, board.black) for board in boards], ">u8")
+    planes = np.unpackbits(bitboards.reshape(-1, 2).view(np.uint8), axis=1)
+    turns = np.array(
+        [board.turn_player_color is Color.white for board in boards], np.uint8
+    )
+    return np.hstack((planes, turns.reshape(-1, 1))).astype(np.float32)
+
+
+class NetworkEvaluator:
+    """Evaluates batches of positions with a multilayer perceptron."""
+
+    def __init__(
+        self,
+        weights: Sequence["np.ndarray"],
+        biases: Sequence["np.ndarray"],
+        batch_size: int = 64,
+    ):
+        """
+        Construct an evaluator from the weights and biases of each layer.
+
+        Layer i maps its inputs to outputs with ``x @ weights[i] + biases[i]``.
+        batch_size is the largest number of positions evaluated by one matrix
+        multiply; larger batches raise throughput at the cost of memory.
+        """
+        if np is None:
+            raise ImportError("NumPy is required to evaluate with a network")
+        if len(weights) != len(biases) or not weights:
+            raise ValueError("Every layer needs weights and biases")
+        if weights[0].shape[0] != N_INPUTS or weights[-1].shape[1] != 1:
+            raise ValueError(f"Network must map {N_INPUTS} inputs to one output")
+        self.weights = [np.asarray(w, np.float32) for w in weights]
+        self.biases = [np.asarray(b, np.float32) for b in biases]
+        self.batch_size = batch_size
+
+    @classmethod
+    def load(cls, path: Union[str, Path], batch_size: int = 64) -> "NetworkEvaluator":
+        """Load an evaluator from weights written by `save`."""
+        if np is None:
+            raise ImportError("NumPy is required to evaluate with a network")
+        with np.load(path) as data:
+            layers = len([name for name in data.files if name.startswith("w")])
+            weights = [data[f"w{i}"] for i in range(layers)]
+            biases = [data[f"b{i}"] for i in range(layers)]
+        return cls(weights, biases, batch_size)
+
+    @classmethod
+    def random(
+        cls,
+        hidden: Sequence[int] = (32,),
+        seed: Optional[int] = None,
+        batch_size: int = 64,
+    ) -> "NetworkEvaluator":
+        """Return an untrained evaluator with `hidden` units per hidden layer."""
+        if np is None:
+            raise ImportError("NumPy is required to evaluate with a network")
+        rng = np.random.default_rng(seed)
+        sizes = [N_INPUTS, *hidden, 1]
+        weights = [
+            rng.normal(0, np.sqrt(2 / n_in), (n_in, n_out))
+            for n_in, n_out in zip(sizes, sizes[1:])
+        ]
+        biases = [np.zeros(n_out) for n_out in sizes[1:]]
+        return cls(weights, biases, batch_size)
+
+    def save(self, path: Union[str, Path]):
+        """Write the weights to `path` as an ``.npz`` file."""
+        arrays = {}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"w{i}"] = w
+            arrays[f"b{i}"] = b
+        np.savez(path, **arrays)
+
+    def fingerprint(self) -> str:
+        """Return a short digest that differs between different weights."""
+        digest = hashlib.sha256()
+        for w, b in zip(self.weights, self.biases):
+            digest.update(repr(w.shape).encode())
+            digest.update(w.tobytes())
+            digest.update(b.tobytes())
+        return digest.hexdigest()[:16]
+
+    def evaluate(self, boards: Sequence[Board]) -> list[float]:
+        """Return the score of each board for its turn player."""
+        scores = []
+        for start in range(0, len(boards), self.batch_size):
+            x = features(boards[start : start + self.batch_size])
+            for w, b in zip(self.weights[:-1], self.biases[:-1]):
+                x = np.maximum(x @ w + b, 0)
+            x = x @ self.weights[-1] + self.biases[-1]
+            scores.extend(x[:, 0].tolist())
+        return scores
@@ -0,0 +1,108 @@
+"""
+Move ordering heuristics.
+
+Moves are tried in this order: the best move from the transposition table,
+the killer moves of the ply, then the remaining moves by a score combining
+static square priorities, the history heuristic and the mobility left to the
+opponent (fastest-first).
+"""
+
+from typing import Optional
+
+from ..bitboard import Position
+from ..board import Board
+from ..color import Color, opposite_color
+
+# Static priority of each square in row-major order. Corners are the most
+# valuable squares and the X and C squares next to them the least.
+SQUARE_PRIORITY = (
+    (8, -4, 4, 3, 3, 4, -4, 8),
+    (-4, -8, -1, -1, -1, -1, -8, -4),
+    (4, -1, 2, 1, 1, 2, -1, 4),
+    (3, -1, 1, 0, 0, 1, -1, 3),
+    (3, -1, 1, 0, 0, 1, -1, 3),
+    (4, -1, 2, 1, 1, 2, -1, 4),
+    (-4, -8, -1, -1, -1, -1, -8, -4),
+    (8, -4, 4, 3, 3, 4, -4, 8),
+)
+
+TT_MOVE_SCORE = 1 << 20
+KILLER_SCORE = 1 << 16
+PRIORITY_WEIGHT = 16
+MOBILITY_WEIGHT = 8
+HISTORY_WEIGHT = 16
+# Counting opponent moves is only worth it when the children have subtrees
+FASTEST_FIRST_MIN_DEPTH = 2
+KILLERS_PER_PLY = 2
+MAX_PLY = 128
+
+
+class MoveOrderer:
+    """Orders moves for a search and learns from the cutoffs it produces."""
+
+    def __init__(self):
+        self._killers: list[list[Position]] = [[] for _ in range(MAX_PLY)]
+        self._history = {color: [[0] * 8 for _ in range(8)] for color in Color}
+        self._history_max = 0
+
+    def order(
+        self,
+        board: Board,
+        moves: list[Position],
+        ply: int,
+        depth: int,
+        tt_move: Optional[Position] = None,
+    ) -> list[Position]:
+        """Return `moves` best first."""
+        color = board.turn_player_color
+        killers = self._killers[ply] if ply < MAX_PLY else []
+        history = self._history[color]
+        fastest_first = depth >= FASTEST_FIRST_MIN_DEPTH
+        scored = []
+        for move in moves:
+            if move == tt_move:
+                score = TT_MOVE_SCORE
+            elif move in killers:
+                score = KILLER_SCORE - killers.index(move)
+            else:
+                score = PRIORITY_WEIGHT * SQUARE_PRIORITY[move.row][move.col]
+                score += (
+                    HISTORY_WEIGHT
+                    * history[move.row][move.col]
+                    // (self._history_max + 1)
+                )
+                if fastest_first:
+                    flips = board.place(color, move)
+                    mobility = board.move_mask(opposite_color(color)).bit_count()
+                    board.undo(color, move, flips)
+                    score -= MOBILITY_WEIGHT * mobility
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def record_cutoff(self, color: Color, move: Position, ply: int, depth: int):
+        """Record that `move` by `color` caused a beta cutoff."""
+        if ply < MAX_PLY:
+            killers = self._killers[ply]
+            if move in killers:
+                killers.remove(move)
+            killers.insert(0, move)
+            del killers[KILLERS_PER_PLY:]
+        history = self._history[color]
+        history[move.row][move.col] += depth * depth
+        self._history_max = max(self._history_max, history[move.row][move.col])
+
+    def advance(self, plies: int):
+        """
+        Prepare the tables for a search `plies` plies after the previous one.
+
+        Killers move with the ply they were found at and history scores decay
+        so that recent cutoffs dominate.
+        """
+        plies = min(plies, MAX_PLY)
+        self._killers = self._killers[plies:] + [[] for _ in range(plies)]
+        for rows in self._history.values():
+            for row in rows:
+                for col in range(8):
+                    row[col] //= 2
+        self._history_max //= 2
@@ -0,0 +1,79 @@
+"""Multi-ProbCut parameters.
+
+Multi-ProbCut predicts the result of a deep search from a shallow one using a
+linear model ``deep = slope * shallow + intercept`` whose residuals have
+standard deviation ``sigma``. When the shallow score lies far enough outside
+the search window, the deep search is assumed to fail the same way and is
+skipped. Parameters are fitted per search depth by `othelloai.ai.calibrate`.
+"""
+
+import hashlib
+import json
+from collections import namedtuple
+from pathlib import Path
+from typing import Union
+
+Cut = namedtuple("Cut", "shallow_depth, slope, intercept, sigma", module=__name__)
+
+
+class ProbCutParams:
+    """Calibrated cut parameters for each search depth."""
+
+    def __init__(self, cuts: dict[int, list[Cut]], threshold: float = 1.5):
+        """
+        Construct parameters from cuts and a threshold.
+
+        cuts maps a search depth to the cuts that are tried at that depth,
+        shallowest first. threshold is the number of standard deviations the
+        predicted score must lie outside the search window for a cut.
+        """
+        self.cuts = {
+            depth: sorted(depth_cuts, key=lambda cut: cut.shallow_depth)
+            for depth, depth_cuts in cuts.items()
+        }
+        self.threshold = threshold
+
+    def cuts_for(self, depth: int) -> list[Cut]:
+        """Return the cuts to try at `depth`."""
+        return self.cuts.get(depth, [])
+
+    def fingerprint(self) -> str:
+        """Return a short digest that differs between different parameters."""
+        data = repr((self.threshold, sorted(self.cuts.items())))
+        return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ProbCutParams":
+        """Load parameters written by `save`."""
+        with open(path) as f:
+            data = json.load(f)
+        cuts = {
+            int(depth): [Cut(*cut) for cut in depth_cuts]
+            for depth, depth_cuts in data["cuts"].items()
+        }
+        return cls(cuts, data["threshold"])
+
+    def save(self, path: Union[str, Path]):
+        """Write parameters to `path` as JSON."""
+        data = dict(
+            threshold=self.threshold,
+            cuts={
+                str(depth): [list(cut) for cut in depth_cuts]
+                for depth, depth_cuts in sorted(self.cuts.items())
+            },
+        )
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+
+
+# Fitted by `othelloai.ai.calibrate` with depths 3 to 6 over every fifth
+# position, up to 300, of 100 self-play games of Marty at depth 3
+DEFAULT_PARAMS = ProbCutParams(
+    {
+        3: [Cut(1, 0.996, -0.389, 2.654)],
+        4: [Cut(2, 1.020, 0.189, 2.322)],
+        5: [Cut(1, 1.002, -0.310, 3.753), Cut(3, 1.017, 0.031, 2.346)],
+        6: [Cut(2, 1.005, 0.395, 4.306), Cut(4, 1.019, 0.330, 2.893)],
+    }
+)
@@ -12,7 +12,6 @@ class RandomAIPlayer(Player):
     """Player that makes random valid moves."""
 
     def _get_move(self, board: Board, interrupt: threading.Event):
-        try:
-            return choose_from(board.valid_moves())
-        except IndexError:
+        if board.must_pass():
             raise PassMove
+        return choose_from(board.valid_moves())
@@ -0,0 +1,359 @@
+"""
+Lazy SMP parallel minmax AI implementation.
+
+Worker processes search the same root position independently and share what
+they learn through a transposition table held in shared memory. Workers are
+staggered: odd workers search one ply deeper than even workers and after the
+best move each worker tries the root moves in a different order, so that
+they fill the table with different parts of the tree. The main process
+returns the deepest result any worker completes.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import struct
+import threading
+import time
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+from ..bitboard import ALL_, Position
+from ..board import Board
+from ..clock import allocate_time
+from ..color import Color
+from ..exception import PlayerInterrupted
+from ..player import Player
+from .minmax import MinmaxAIPlayer
+from .table import Bound, Entry
+
+_logger = logging.getLogger(__name__)
+
+# white ^ data, black ^ data and data, which packs the score as the bits of a
+# float32, move, bound, depth and turn (0 for an empty slot) from the low bits
+# up. Disc differences and network scores are both exact in a float32.
+_SLOT = struct.Struct("<QQQ")
+_SCORE = struct.Struct("<f")
+_BOUNDS = list(Bound)
+_NO_MOVE = 0xFF
+_TURNS = {Color.black: 1, Color.white: 2}
+_HASH_WHITE = 0x9E3779B97F4A7C15
+_HASH_BLACK = 0xC2B2AE3D27D4EB4F
+
+# Results are polled so that interrupts are noticed while workers search
+_POLL_INTERVAL = 0.1
+
+
+def _pack(turn: int, depth: int, bound: Bound, square: int, score: float) -> int:
+    return (
+        int.from_bytes(_SCORE.pack(score), "little")
+        | square << 32
+        | _BOUNDS.index(bound) << 40
+        | depth << 48
+        | turn << 56
+    )
+
+
+def _unpack_score(data: int) -> float:
+    (score,) = _SCORE.unpack((data & 0xFFFFFFFF).to_bytes(4, "little"))
+    # Disc differences are read back as the integers they were stored as
+    return int(score) if score.is_integer() else score
+
+
+class SharedTranspositionTable:
+    """
+    Transposition table in shared memory for use by several processes.
+
+    The table has the same interface as `TranspositionTable`. Positions are
+    hashed to a fixed number of slots. A slot is replaced by a result for a
+    different position or by a deeper result for the same position.
+
+    Slots are read and written without locks. Each holds the pieces XORed
+    with the packed result, so a slot torn by concurrent writers no longer
+    matches the position it is read for and is treated as empty.
+    """
+
+    def __init__(self, bits: int = 20, name: Optional[str] = None):
+        """
+        Create a table of 2**`bits` slots.
+
+        Pass the `name` of an existing table to attach to it instead;
+        `attach_args` returns it.
+        """
+        self._bits = bits
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=_SLOT.size << bits)
+            self._owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            # The creating process owns the segment. Without unregistering, the
+            # resource tracker would unlink it when this process exits.
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+            self._owner = False
+
+    def attach_args(self) -> tuple:
+        """Return the arguments that attach another process to this table."""
+        return self._bits, self._shm.name
+
+    def _slot(self, white: int, black: int, turn: int) -> int:
+        h = (white * _HASH_WHITE + black * _HASH_BLACK + turn) & ALL_
+        return h >> (64 - self._bits)
+
+    def _read(self, offset: int, white: int, black: int, turn: int) -> Optional[int]:
+        """Return the packed result in the slot at `offset` for a position."""
+        white_check, black_check, data = _SLOT.unpack_from(self._shm.buf, offset)
+        if (
+            white_check ^ data != white
+            or black_check ^ data != black
+            or data >> 56 != turn
+        ):
+            return None
+        return data
+
+    def get(self, board: Board) -> Optional[Entry]:
+        """Return the entry for `board` or None if there is none."""
+        white, black = board.white, board.black
+        turn = _TURNS[board.turn_player_color]
+        slot = self._slot(white, black, turn)
+        data = self._read(slot * _SLOT.size, white, black, turn)
+        if data is None:
+            return None
+        move = (data >> 32) & 0xFF
+        move = Position(*divmod(move, 8)) if move != _NO_MOVE else None
+        bound = _BOUNDS[(data >> 40) & 0xFF]
+        return Entry((data >> 48) & 0xFF, _unpack_score(data), bound, move)
+
+    def store(
+        self,
+        board: Board,
+        depth: int,
+        score: float,
+        bound: Bound,
+        move: Optional[Position],
+    ):
+        """Store a search result for `board` unless a deeper one is stored."""
+        white, black = board.white, board.black
+        turn = _TURNS[board.turn_player_color]
+        offset = self._slot(white, black, turn) * _SLOT.size
+        existing = self._read(offset, white, black, turn)
+        if existing is not None and (existing >> 48) & 0xFF > depth:
+            return
+        square = move.row * 8 + move.col if move is not None else _NO_MOVE
+        data = _pack(turn, depth, bound, square, score)
+        _SLOT.pack_into(self._shm.buf, offset, white ^ data, black ^ data, data)
+
+    def clear(self):
+        """Remove all entries."""
+        self._shm.buf[:] = bytes(len(self._shm.buf))
+
+    def close(self):
+        """Detach from the table, freeing it if this process created it."""
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class _SearchCancelled:
+    """Interrupt that is set once the main process starts another search."""
+
+    def __init__(self, current_search, search_id: int):
+        self._current_search = current_search
+        self._search_id = search_id
+
+    def is_set(self) -> bool:
+        return self._current_search.value != self._search_id
+
+
+class _HelperSearch(MinmaxAIPlayer):
+    """Minmax search run by a worker process."""
+
+    def __init__(self, index: int, **kwargs):
+        super().__init__(Color.black, 0, **kwargs)
+        self._index = index
+
+    def _ordered(
+        self,
+        board: Board,
+        potential_moves: list[Position],
+        ply: int,
+        depth: int,
+        tt_move: Optional[Position],
+    ) -> list[Position]:
+        ordered = super()._ordered(board, potential_moves, ply, depth, tt_move)
+        if ply > 0 or len(ordered) < 3:
+            return ordered
+        # The best move is searched first by every worker, after which each
+        # worker goes down a different line
+        first, rest = ordered[:1], ordered[1:]
+        shift = self._index % len(rest)
+        return first + rest[shift:] + rest[:shift]
+
+    def search_root(self, board: Board, interrupt, report):
+        """Iteratively deepen on `board` and `report` each completed depth."""
+        self._interrupt = interrupt
+        potential_moves = board.valid_moves()
+        best_move = potential_moves[0]
+        depth = 1 + self._index % 2
+        try:
+            while depth <= board.empty_cells().bit_count():
+                score, best_move = self._search_root(
+                    board, potential_moves, depth, best_move
+                )
+                report(depth, score, best_move)
+                depth += 1
+        except PlayerInterrupted:
+            pass
+        finally:
+            self._interrupt = None
+
+
+def _work(index: int, table_args: tuple, options: dict, tasks, results, current):
+    """Run searches from `tasks` until a None task is received."""
+    table = SharedTranspositionTable(*table_args)
+    search = _HelperSearch(index, table=table, **options)
+    try:
+        for task in iter(tasks.get, None):
+            search_id, white, black, turn = task
+            board = Board(white, black, Color[turn])
+            search.search_root(
+                board,
+                _SearchCancelled(current, search_id),
+                lambda *result: results.put((search_id, index, *result)),
+            )
+    finally:
+        table.close()
+
+
+def _shutdown(tasks: list, processes: list, table: SharedTranspositionTable):
+    for task_queue in tasks:
+        task_queue.put(None)
+    for process in processes:
+        process.join(timeout=1)
+        if process.is_alive():
+            process.terminate()
+    table.close()
+
+
+class ParallelMinmaxAIPlayer(Player):
+    """
+    Player that searches with several minmax worker processes at once.
+
+    The selective search, ordering and evaluation options of
+    `MinmaxAIPlayer` are passed on to each worker. A `cache_path`, disabling
+    the transposition table with `tt` and a `max_nodes` limit are not
+    supported, since the workers share results through their table and
+    search for as long as the main process waits.
+    The workers and their shared table are started on the first move and
+    persist until the player is garbage collected.
+    """
+
+    def __init__(
+        self,
+        color: Color,
+        depth: int,
+        workers: Optional[int] = None,
+        table_bits: int = 20,
+        **kwargs,
+    ):
+        if kwargs.get("cache_path") is not None:
+            raise ValueError("Parallel search does not support an analysis cache")
+        if not kwargs.pop("tt", True):
+            raise ValueError("Parallel search needs its transposition table")
+        if kwargs.pop("max_nodes", None) is not None:
+            raise ValueError("Parallel search does not support a node limit")
+        options = {
+            key: kwargs.pop(key)
+            for key in (
+                "probcut",
+                "lmr",
+                "probcut_params",
+                "ordering",
+                "network",
+            )
+            if key in kwargs
+        }
+        super().__init__(color, **kwargs)
+        self._depth = depth
+        self._workers = workers if workers is not None else os.cpu_count()
+        self._table_bits = table_bits
+        self._options = options
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: list = []
+        self._tasks: list = []
+        self._results = None
+        self._current_search = None
+        self._lock = threading.Lock()
+
+    def _start_workers(self):
+        table = SharedTranspositionTable(self._table_bits)
+        self._results = self._context.Queue()
+        self._current_search = self._context.RawValue("i", 0)
+        for index in range(self._workers):
+            tasks = self._context.Queue()
+            process = self._context.Process(
+                target=_work,
+                args=(
+                    index,
+                    table.attach_args(),
+                    self._options,
+                    tasks,
+                    self._results,
+                    self._current_search,
+                ),
+                name=f"SearchWorker ({index})",
+                daemon=True,
+            )
+            process.start()
+            self._tasks.append(tasks)
+            self._processes.append(process)
+        weakref.finalize(self, _shutdown, self._tasks, self._processes, table)
+        _logger.debug("Started %d search workers", self._workers)
+
+    def _get_move(self, board: Board, interrupt: threading.Event) -> Position:
+        potential_moves = board.valid_moves()
+        if len(potential_moves) == 1:
+            return potential_moves[0]
+        empties = board.empty_cells().bit_count()
+        deadline = (
+            time.monotonic() + allocate_time(self.clock, empties)
+            if self.clock is not None
+            else None
+        )
+        with self._lock:
+            if not self._processes:
+                self._start_workers()
+            return self._parallel_search(board, interrupt, deadline)
+
+    def _parallel_search(
+        self, board: Board, interrupt: threading.Event, deadline: Optional[float]
+    ) -> Position:
+        search_id = self._current_search.value + 1
+        self._current_search.value = search_id
+        task = (search_id, board.white, board.black, board.turn_player_color.name)
+        for tasks in self._tasks:
+            tasks.put(task)
+
+        target_depth = min(self._depth, board.empty_cells().bit_count())
+        best_depth, best_move = 0, board.valid_moves()[0]
+        try:
+            while best_depth < target_depth:
+                if interrupt.is_set():
+                    raise PlayerInterrupted
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                if not any(process.is_alive() for process in self._processes):
+                    raise RuntimeError("All search workers have exited")
+                try:
+                    result = self._results.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                result_id, index, depth, score, move = result
+                if result_id == search_id and depth > best_depth:
+                    _logger.debug("Worker %d completed depth %d", index, depth)
+                    best_depth, best_move = depth, move
+        finally:
+            # Cancels the workers' searches
+            self._current_search.value = search_id + 1
+        return best_move
@@ -0,0 +1,67 @@
+"""Transposition table for search results."""
+
+import enum
+from collections import namedtuple
+from typing import Optional
+
+from ..bitboard import Position
+from ..board import Board
+
+
+class Bound(enum.Enum):
+    """How a stored score relates to the true score of a position."""
+
+    exact = enum.auto()
+    lower = enum.auto()
+    upper = enum.auto()
+
+
+Entry = namedtuple("Entry", "depth, score, bound, move", module=__name__)
+
+
+def board_key(board: Board) -> tuple:
+    """Return a key that identifies the position of `board`."""
+    return board.white, board.black, board.turn_player_color
+
+
+class TranspositionTable:
+    """
+    Bounded table of search results keyed by position.
+
+    Deeper results replace shallower ones for the same position. When the
+    table is full the oldest entry is evicted.
+    """
+
+    def __init__(self, max_entries: int = 1 << 18):
+        self._max_entries = max_entries
+        self._entries: dict[tuple, Entry] = {}
+
+    def get(self, board: Board) -> Optional[Entry]:
+        """Return the entry for `board` or None if there is none."""
+        return self._entries.get(board_key(board))
+
+    def store(
+        self,
+        board: Board,
+        depth: int,
+        score: float,
+        bound: Bound,
+        move: Optional[Position],
+    ):
+        """Store a search result for `board` unless a deeper one is stored."""
+        key = board_key(board)
+        existing = self._entries.get(key)
+        if existing is not None:
+            if existing.depth > depth:
+                return
+            del self._entries[key]
+        elif len(self._entries) >= self._max_entries:
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = Entry(depth, score, bound, move)
+
+    def clear(self):
+        """Remove all entries."""
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -11,6 +11,8 @@ class Args:
 
     def __init__(self):
         self.profile_dir: Optional[Path] = None
+        self.telemetry_path: Optional[Path] = None
+        self.telemetry_interval = 10.0
 
     def parse_args(self, argv: Optional[list[str]] = None):
         parser = ArgumentParser()
@@ -21,6 +23,19 @@ class Args:
             type=Path,
             dest="profile_dir",
         )
+        parser.add_argument(
+            "--telemetry",
+            help="Export game metrics to the specified file, in the Prometheus "
+            "text format if it ends in .prom and as JSON lines otherwise",
+            type=Path,
+            dest="telemetry_path",
+        )
+        parser.add_argument(
+            "--telemetry-interval",
+            help="Seconds between metric exports",
+            type=float,
+            default=10.0,
+        )
         parser.parse_args(argv, namespace=self)
 
     @property
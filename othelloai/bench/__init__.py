@@ -0,0 +1,192 @@
+"""
+Search benchmark suite.
+
+Engines analyze a fixed set of test positions, each with a known best score
+and the moves that achieve it. Endgame positions are searched to the end of
+the game, so their scores are exact final disc differences. Midgame positions
+are searched to a fixed depth and their reference scores come from a
+full-width search to that depth. For every position the benchmark records
+correctness, nodes, time, nodes per second and the depth the search
+completed. Under a node budget, searches stop at the last depth they
+completed, which shows how deep a selective search reaches for the same
+effort. Results are written as JSON and can be compared against a stored
+baseline.
+
+Usage: python -m othelloai.bench [ENGINE...] -o results.json --baseline FILE
+"""
+
+import json
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from ..ai import ai_options
+from ..board import Board, CompactBoard
+from ..match import parse_engine
+from ..record import format_move, parse_move
+
+POSITIONS_PATH = Path(__file__).with_name("positions.txt")
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+TestPosition = namedtuple(
+    "TestPosition", "name, kind, board, depth, best_moves, score", module=__name__
+)
+
+
+def parse_board(cells: str, turn: str) -> Board:
+    """
+    Return the board written as 64 cells and the player to move.
+
+    Cells are listed row by row from a1 with ``X`` for black, ``O`` for white
+    and ``-`` for an empty cell. turn is ``X`` or ``O``.
+    """
+    return CompactBoard.from_text(f"{cells} {turn}").to_board()
+
+
+def format_board(board: Board) -> str:
+    """Return `board` written in the format read by `parse_board`."""
+    return CompactBoard.from_board(board).to_text()
+
+
+def read_positions(path: Union[str, Path] = POSITIONS_PATH) -> list[TestPosition]:
+    """
+    Read test positions from `path`.
+
+    Each line holds a name, ``endgame`` or ``midgame``, the board cells and
+    player to move, the search depth, the comma separated best moves and the
+    score for the player to move. Lines beginning with ``#`` are ignored.
+    """
+    positions = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, kind, cells, turn, depth, best_moves, score = line.split()
+            positions.append(
+                TestPosition(
+                    name,
+                    kind,
+                    parse_board(cells, turn),
+                    int(depth),
+                    [parse_move(move) for move in best_moves.split(",")],
+                    int(score),
+                )
+            )
+    return positions
+
+
+def run_position(player, position: TestPosition, depth: Optional[int] = None) -> dict:
+    """
+    Analyze `position` with `player` and return the measurements.
+
+    The position is searched to `depth` if given instead of its own depth.
+    Correctness is still judged against the reference at its own depth.
+    """
+    started_at = time.perf_counter()
+    score, move = player.analyze(
+        position.board.copy(), depth if depth is not None else position.depth
+    )
+    seconds = time.perf_counter() - started_at
+    return dict(
+        name=position.name,
+        kind=position.kind,
+        move=format_move(move) if move is not None else None,
+        score=score,
+        correct=move in position.best_moves and score == position.score,
+        depth=player.completed_depth,
+        nodes=player.nodes,
+        seconds=seconds,
+        nps=player.nodes / seconds if seconds else 0.0,
+    )
+
+
+def run_suite(
+    engine: str,
+    positions: Iterable[TestPosition],
+    depth: Optional[int] = None,
+    max_nodes: Optional[int] = None,
+) -> dict:
+    """
+    Run the benchmark for one engine configuration.
+
+    engine is written as for the match runner, e.g. ``Marty:lmr=true``, and
+    must be an AI that can analyze positions. Its depth is ignored since each
+    position has its own, unless `depth` overrides them all. Searches stop
+    within `max_nodes` nodes if given. A fresh player is used for every
+    position so that results do not depend on the order of the positions.
+    """
+    ai, options = parse_engine(engine)
+    options.pop("depth", None)
+    if max_nodes is not None:
+        options["max_nodes"] = max_nodes
+    player_class = ai_options[ai]
+    if not hasattr(player_class, "analyze"):
+        raise ValueError(f"{ai.name} cannot analyze positions")
+
+    results = []
+    for position in positions:
+        player = player_class(position.board.turn_player_color, 0, **options)
+        results.append(run_position(player, position, depth))
+    nodes = sum(result["nodes"] for result in results)
+    seconds = sum(result["seconds"] for result in results)
+    return dict(
+        engine=engine,
+        positions=results,
+        summary=dict(
+            correct=sum(result["correct"] for result in results),
+            total=len(results),
+            depth=(
+                sum(result["depth"] for result in results) / len(results)
+                if results
+                else 0.0
+            ),
+            nodes=nodes,
+            seconds=seconds,
+            nps=nodes / seconds if seconds else 0.0,
+        ),
+    )
+
+
+def compare(
+    results: dict,
+    baseline: dict,
+    node_tolerance: float = 0.05,
+    time_tolerance: float = 0.5,
+) -> list[str]:
+    """
+    Return the regressions of `results` against `baseline` for one engine.
+
+    A position regresses if it was solved correctly and no longer is, or if
+    its nodes or time grew by more than the relative tolerance.
+    """
+    regressions = []
+    reference = {result["name"]: result for result in baseline["positions"]}
+    for result in results["positions"]:
+        before = reference.get(result["name"])
+        if before is None:
+            continue
+        name = result["name"]
+        if before["correct"] and not result["correct"]:
+            regressions.append(f"{name}: no longer solved")
+        if result["nodes"] > before["nodes"] * (1 + node_tolerance):
+            regressions.append(f"{name}: nodes {before['nodes']} -> {result['nodes']}")
+        if result["seconds"] > before["seconds"] * (1 + time_tolerance):
+            regressions.append(
+                f"{name}: seconds {before['seconds']:.3f} -> {result['seconds']:.3f}"
+            )
+    return regressions
+
+
+def load_results(path: Union[str, Path]) -> dict[str, dict]:
+    """Return the results in a file written by `save_results` by engine."""
+    with open(path) as f:
+        return {results["engine"]: results for results in json.load(f)}
+
+
+def save_results(path: Union[str, Path], results: list[dict]):
+    """Write the results of several engines to `path` as JSON."""
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
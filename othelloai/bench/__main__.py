@@ -0,0 +1,92 @@
+"""Command line interface of the search benchmark suite."""
+
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Optional
+
+from . import (
+    BASELINE_PATH,
+    POSITIONS_PATH,
+    compare,
+    load_results,
+    read_positions,
+    run_suite,
+    save_results,
+)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Run the benchmark and return the exit status."""
+    parser = ArgumentParser(description="Benchmark search on test positions")
+    parser.add_argument(
+        "engines",
+        nargs="*",
+        default=["Marty"],
+        help="Engine configurations, e.g. Marty:lmr=true",
+    )
+    parser.add_argument("-o", "--output", type=Path, help="JSON results file")
+    parser.add_argument("--positions", type=Path, default=POSITIONS_PATH)
+    parser.add_argument(
+        "--kind", choices=["endgame", "midgame"], help="Only run one kind"
+    )
+    parser.add_argument(
+        "-d", "--depth", type=int, help="Search every position to this depth"
+    )
+    parser.add_argument(
+        "--max-nodes", type=int, help="Node budget of each search, see --depth"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write the results to the baseline instead of comparing",
+    )
+    parser.add_argument("--node-tolerance", type=float, default=0.05)
+    parser.add_argument("--time-tolerance", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    positions = [
+        position
+        for position in read_positions(args.positions)
+        if args.kind is None or position.kind == args.kind
+    ]
+    all_results = []
+    for engine in args.engines:
+        results = run_suite(engine, positions, args.depth, args.max_nodes)
+        summary = results["summary"]
+        print(
+            f"{engine}: {summary['correct']}/{summary['total']} correct,"
+            f" mean depth {summary['depth']:.2f},"
+            f" {summary['nodes']} nodes in {summary['seconds']:.2f}s"
+            f" ({summary['nps']:.0f} nodes/s)"
+        )
+        all_results.append(results)
+    if args.output is not None:
+        save_results(args.output, all_results)
+
+    if args.update_baseline:
+        save_results(args.baseline, all_results)
+        return 0
+    if not args.baseline.exists():
+        return 0
+    baseline = load_results(args.baseline)
+    status = 0
+    for results in all_results:
+        if results["engine"] not in baseline:
+            print(f"{results['engine']}: no baseline")
+            continue
+        regressions = compare(
+            results,
+            baseline[results["engine"]],
+            args.node_tolerance,
+            args.time_tolerance,
+        )
+        for regression in regressions:
+            print(f"{results['engine']}: {regression}")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
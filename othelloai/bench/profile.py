@@ -0,0 +1,343 @@
+"""
+Reproducible search profiles.
+
+An engine analyzes every position of a fixed set of recorded games, or the
+benchmark test positions, to a fixed depth and optionally a node limit, with
+the random number generator seeded. The searches run under cProfile or a
+sampling profiler and costs are reported per function and per game phase.
+Two reports can be compared to see where an optimization gained or lost.
+
+Usage: python -m othelloai.bench.profile run ENGINE -o profile.json
+       python -m othelloai.bench.profile diff BEFORE AFTER
+"""
+
+import cProfile
+import json
+import pstats
+import random
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from ..ai import ai_options
+from ..board import Board
+from ..color import Color
+from ..match import parse_engine
+from ..record import read_records, replay
+from . import POSITIONS_PATH, read_positions
+
+PHASES = ("opening", "midgame", "endgame")
+# Positions with more empty squares than this are in the opening
+OPENING_EMPTIES = 44
+# Positions with this many empty squares or fewer are in the endgame
+ENDGAME_EMPTIES = 16
+SAMPLE_INTERVAL = 0.001
+
+_PACKAGE_ROOT = str(Path(__file__).parents[2])
+
+
+def phase_of(board: Board) -> str:
+    """Return the phase of the game `board` is in."""
+    empties = board.empty_cells().bit_count()
+    if empties > OPENING_EMPTIES:
+        return "opening"
+    if empties > ENDGAME_EMPTIES:
+        return "midgame"
+    return "endgame"
+
+
+def _function_name(filename: str, lineno: int, name: str) -> str:
+    """Return a name of a function that is the same on every machine."""
+    if filename.startswith(_PACKAGE_ROOT):
+        filename = filename[len(_PACKAGE_ROOT) + 1 :]
+    else:
+        filename = Path(filename).name
+    return f"{filename}:{lineno}({name})"
+
+
+class CProfileCollector:
+    """Collects the exact cost of functions with cProfile."""
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def __enter__(self):
+        self._profile.enable()
+
+    def __exit__(self, *exc_info):
+        self._profile.disable()
+
+    def functions(self) -> dict[str, dict]:
+        """Return the calls, own time and cumulative time of each function."""
+        self._profile.create_stats()
+        if not self._profile.stats:
+            return {}
+        stats = pstats.Stats(self._profile).stats
+        return {
+            _function_name(*func): dict(calls=calls, tottime=tottime, cumtime=cumtime)
+            for func, (_, calls, tottime, cumtime, _) in stats.items()
+        }
+
+
+class SamplingCollector:
+    """
+    Estimates the cost of functions by sampling the stack of the thread.
+
+    Sampling slows the search down far less than cProfile, so the relative
+    costs of cheap, often called functions are closer to the truth. Times are
+    the number of samples in which a function was running, or on the stack
+    for cumulative time, times the sampling interval.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self._own: dict[str, int] = {}
+        self._cumulative: dict[str, int] = {}
+        self._stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        self._stopped.clear()
+        self._sampler = threading.Thread(
+            target=self._sample, args=(threading.get_ident(),), daemon=True
+        )
+        self._sampler.start()
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._sampler.join()
+
+    def _sample(self, thread_id: int):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            own = True
+            seen = set()
+            while frame is not None:
+                code = frame.f_code
+                name = _function_name(
+                    code.co_filename, code.co_firstlineno, code.co_name
+                )
+                if own:
+                    self._own[name] = self._own.get(name, 0) + 1
+                    own = False
+                if name not in seen:
+                    seen.add(name)
+                    self._cumulative[name] = self._cumulative.get(name, 0) + 1
+                frame = frame.f_back
+
+    def functions(self) -> dict[str, dict]:
+        """Return the estimated own and cumulative time of each function."""
+        return {
+            name: dict(
+                calls=None,
+                tottime=self._own.get(name, 0) * self.interval,
+                cumtime=samples * self.interval,
+            )
+            for name, samples in self._cumulative.items()
+        }
+
+
+PROFILERS = {"cprofile": CProfileCollector, "sampling": SamplingCollector}
+
+
+def record_games(
+    paths: Iterable[Path], every: int = 1, max_games: Optional[int] = None
+) -> list[list[Board]]:
+    """Return every `every`th position of the games in the record files."""
+    games = (
+        list(islice(replay(moves), 0, None, every))
+        for path in paths
+        for moves in read_records(path)
+    )
+    return list(islice(games, max_games))
+
+
+def run_profile(
+    engine: str,
+    games: list[list[tuple[Board, int]]],
+    profiler: str = "cprofile",
+    seed: int = 0,
+    max_nodes: Optional[int] = None,
+    top: int = 40,
+) -> dict:
+    """
+    Profile `engine` analyzing the positions of `games` to the given depths.
+
+    games holds (board, depth) pairs for each game, analyzed in order by a
+    player kept for the whole game so that its tables carry over as in real
+    play. Returns the report, with the `top` functions by own time overall
+    and in each phase.
+    """
+    ai, options = parse_engine(engine)
+    options.pop("depth", None)
+    if max_nodes is not None:
+        options["max_nodes"] = max_nodes
+    player_class = ai_options[ai]
+    if not hasattr(player_class, "analyze"):
+        raise ValueError(f"{ai.name} cannot analyze positions")
+
+    random.seed(seed)
+    collectors = {phase: PROFILERS[profiler]() for phase in PHASES}
+    phases = {phase: dict(positions=0, nodes=0, seconds=0.0) for phase in PHASES}
+    for game in games:
+        player = player_class(Color.black, 0, **options)
+        for board, depth in game:
+            phase = phase_of(board)
+            started_at = time.perf_counter()
+            with collectors[phase]:
+                player.analyze(board.copy(), depth)
+            phases[phase]["seconds"] += time.perf_counter() - started_at
+            phases[phase]["nodes"] += player.nodes
+            phases[phase]["positions"] += 1
+
+    totals: dict[str, dict] = {}
+    for phase in PHASES:
+        functions = collectors[phase].functions()
+        phases[phase]["functions"] = _top_functions(functions, top)
+        for name, cost in functions.items():
+            total = totals.setdefault(name, dict(calls=0, tottime=0.0, cumtime=0.0))
+            for key in ("calls", "tottime", "cumtime"):
+                if cost[key] is None:
+                    total[key] = None
+                elif total[key] is not None:
+                    total[key] += cost[key]
+    return dict(
+        engine=engine,
+        profiler=profiler,
+        seed=seed,
+        max_nodes=max_nodes,
+        positions=sum(phases[phase]["positions"] for phase in PHASES),
+        nodes=sum(phases[phase]["nodes"] for phase in PHASES),
+        seconds=sum(phases[phase]["seconds"] for phase in PHASES),
+        phases=phases,
+        functions=_top_functions(totals, top),
+    )
+
+
+def _top_functions(functions: dict[str, dict], top: int) -> list[dict]:
+    ranked = sorted(functions.items(), key=lambda item: -item[1]["tottime"])
+    return [dict(function=name, **cost) for name, cost in ranked[:top]]
+
+
+def diff(before: dict, after: dict, top: int = 20) -> list[str]:
+    """Return lines comparing the costs of two reports."""
+
+    def change(a: float, b: float) -> str:
+        return f"{(b - a) / a:+.1%}" if a else "n/a"
+
+    lines = [f"{'phase':<10}{'seconds':>24}{'nodes':>28}"]
+    for phase in PHASES + ("total",):
+        a = before["phases"][phase] if phase != "total" else before
+        b = after["phases"][phase] if phase != "total" else after
+        seconds_change = change(a["seconds"], b["seconds"])
+        nodes_change = change(a["nodes"], b["nodes"])
+        lines.append(
+            f"{phase:<10}"
+            f"{a['seconds']:>8.3f} -> {b['seconds']:>8.3f} {seconds_change:>7}"
+            f"{a['nodes']:>10} -> {b['nodes']:>10} {nodes_change:>7}"
+        )
+
+    own_before = {f["function"]: f["tottime"] for f in before["functions"]}
+    own_after = {f["function"]: f["tottime"] for f in after["functions"]}
+    deltas = sorted(
+        (
+            (own_after.get(name, 0.0) - own_before.get(name, 0.0), name)
+            for name in own_before.keys() | own_after.keys()
+        ),
+        key=lambda item: -abs(item[0]),
+    )
+    lines.append("")
+    lines.append(f"{'own seconds':>30}  function")
+    for delta, name in deltas[:top]:
+        lines.append(
+            f"{own_before.get(name, 0.0):>8.3f} -> {own_after.get(name, 0.0):>8.3f}"
+            f" {delta:>+8.3f}  {name}"
+        )
+    return lines
+
+
+def load_report(path: Union[str, Path]) -> dict:
+    """Return the report written to `path` by `save_report`."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_report(path: Union[str, Path], report: dict):
+    """Write `report` to `path` as JSON."""
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point of the profiling harness."""
+    parser = ArgumentParser(description="Profile an engine on fixed positions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Profile an engine")
+    run.add_argument("engine", help="Engine to profile, e.g. Marty:lmr=true")
+    run.add_argument("-o", "--output", type=Path, required=True, help="Report file")
+    run.add_argument(
+        "--records",
+        type=Path,
+        nargs="+",
+        help="Record files of games to replay instead of the test positions",
+    )
+    run.add_argument(
+        "-d",
+        "--depth",
+        type=int,
+        help="Search depth, by default 4 for games and each test position's own",
+    )
+    run.add_argument("--max-nodes", type=int, help="Node limit of each search")
+    run.add_argument("--seed", type=int, default=0, help="Random seed")
+    run.add_argument(
+        "--profiler", choices=sorted(PROFILERS), default="cprofile", help="Profiler"
+    )
+    run.add_argument(
+        "--every", type=int, default=1, help="Only analyze every nth position"
+    )
+    run.add_argument("--max-games", type=int, help="Limit the number of games")
+    run.add_argument("--top", type=int, default=40, help="Functions to report")
+    compare = commands.add_parser("diff", help="Compare two reports")
+    compare.add_argument("before", type=Path)
+    compare.add_argument("after", type=Path)
+    compare.add_argument("--top", type=int, default=20, help="Functions to show")
+    args = parser.parse_args(argv)
+
+    if args.command == "diff":
+        for line in diff(load_report(args.before), load_report(args.after), args.top):
+            print(line)
+        return 0
+
+    if args.records is not None:
+        depth = args.depth if args.depth is not None else 4
+        games = [
+            [(board, depth) for board in game]
+            for game in record_games(args.records, args.every, args.max_games)
+        ]
+    else:
+        games = [
+            [(position.board, args.depth or position.depth)]
+            for position in read_positions(POSITIONS_PATH)
+        ]
+    report = run_profile(
+        args.engine, games, args.profiler, args.seed, args.max_nodes, args.top
+    )
+    save_report(args.output, report)
+    for phase in PHASES:
+        stats = report["phases"][phase]
+        print(
+            f"{phase}: {stats['positions']} positions, {stats['nodes']} nodes"
+            f" in {stats['seconds']:.2f}s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -77,14 +77,122 @@ def not_(bits: int) -> int:
 def to_list(bits: int) -> list[Position]:
     """Return a list of positions corresponding to the bits set in `bits`."""
     positions = []
-    for r in range(8):
-        for c in range(8):
-            mask = pos_mask(r, c)
-            if bits & mask > 0:
-                positions.append(Position(r, c))
+    bits &= ALL_
+    while bits:
+        # The highest bit is the first position in row-major order
+        top = bits.bit_length() - 1
+        positions.append(Position(*divmod(63 - top, 8)))
+        bits ^= 1 << top
     return positions
 
 
 def count(bits: int) -> int:
     """Return the count of occupied cells on the bitboard."""
     return len(to_list(bits))  # I'm lazy
+
+
+# Transforms by the symmetries of the board. Each is a sequence of delta swaps,
+# which exchange the bits selected by a mask with those `delta` bits away
+
+
+def _delta_swap(bits: int, mask: int, delta: int) -> int:
+    t = ((bits >> delta) ^ bits) & mask
+    return bits ^ t ^ (t << delta)
+
+
+def flip_vertical(bits: int) -> int:
+    """Return `bits` flipped top to bottom, i.e. (row, col) -> (7 - row, col)."""
+    bits = _delta_swap(bits, 0x00FF00FF00FF00FF, 8)
+    bits = _delta_swap(bits, 0x0000FFFF0000FFFF, 16)
+    return _delta_swap(bits, 0x00000000FFFFFFFF, 32)
+
+
+def mirror_horizontal(bits: int) -> int:
+    """Return `bits` mirrored left to right, i.e. (row, col) -> (row, 7 - col)."""
+    bits = _delta_swap(bits, 0x5555555555555555, 1)
+    bits = _delta_swap(bits, 0x3333333333333333, 2)
+    return _delta_swap(bits, 0x0F0F0F0F0F0F0F0F, 4)
+
+
+def flip_diagonal(bits: int) -> int:
+    """Return `bits` flipped about the a1-h8 diagonal: (row, col) -> (col, row)."""
+    bits = _delta_swap(bits, 0x00000000F0F0F0F0, 28)
+    bits = _delta_swap(bits, 0x0000CCCC0000CCCC, 14)
+    return _delta_swap(bits, 0x00AA00AA00AA00AA, 7)
+
+
+def flip_anti_diagonal(bits: int) -> int:
+    """Return `bits` flipped about the h1-a8 diagonal.
+
+    (row, col) -> (7 - col, 7 - row)
+    """
+    bits = _delta_swap(bits, 0x000000000F0F0F0F, 36)
+    bits = _delta_swap(bits, 0x0000333300003333, 18)
+    return _delta_swap(bits, 0x0055005500550055, 9)
+
+
+def rotate_90(bits: int) -> int:
+    """Return `bits` rotated clockwise, i.e. (row, col) -> (col, 7 - row)."""
+    return mirror_horizontal(flip_diagonal(bits))
+
+
+def rotate_180(bits: int) -> int:
+    """Return `bits` rotated half a turn: (row, col) -> (7 - row, 7 - col)."""
+    return mirror_horizontal(flip_vertical(bits))
+
+
+def rotate_270(bits: int) -> int:
+    """Return `bits` rotated anticlockwise, i.e. (row, col) -> (7 - col, row)."""
+    return flip_vertical(flip_diagonal(bits))
+
+
+def _identity(bits: int) -> int:
+    return bits
+
+
+# The symmetries of the board numbered by their index, the identity first
+TRANSFORMS = (
+    _identity,
+    rotate_90,
+    rotate_180,
+    rotate_270,
+    mirror_horizontal,
+    flip_vertical,
+    flip_diagonal,
+    flip_anti_diagonal,
+)
+# Number of the transform undoing each transform
+INVERSE_TRANSFORMS = (0, 3, 2, 1, 4, 5, 6, 7)
+_POSITION_TRANSFORMS = (
+    lambda r, c: (r, c),
+    lambda r, c: (c, 7 - r),
+    lambda r, c: (7 - r, 7 - c),
+    lambda r, c: (7 - c, r),
+    lambda r, c: (r, 7 - c),
+    lambda r, c: (7 - r, c),
+    lambda r, c: (c, r),
+    lambda r, c: (7 - c, 7 - r),
+)
+
+
+def transform_position(pos: Position, transform: int) -> Position:
+    """Return the image of `pos` under the transform numbered `transform`."""
+    return Position(*_POSITION_TRANSFORMS[transform](*pos))
+
+
+def canonical(white: int, black: int) -> tuple[int, int, int]:
+    """
+    Return the least symmetric form of a position and the transform to it.
+
+    The symmetric forms of the position with pieces `white` and `black` are
+    ordered by (white, black). Returns the white and black pieces of the least
+    one and the number of the transform that produces it. Positions in that
+    form map back with ``INVERSE_TRANSFORMS[transform]``.
+    """
+    best = (white, black, 0)
+    for i in range(1, len(TRANSFORMS)):
+        transform = TRANSFORMS[i]
+        candidate = (transform(white), transform(black), i)
+        if candidate < best:
+            best = candidate
+    return best
@@ -2,10 +2,46 @@
 
 import re
 from copy import copy
+from typing import Optional
 
 from . import bitboard as bb
 from .color import Color
 from .exception import IllegalMoveError
+from .features import FeatureState, square_of
+
+
+def _move_mask(my_pieces: int, foe_pieces: int) -> int:
+    """Return the bitboard of valid moves for the owner of `my_pieces`."""
+    empty = bb.not_(my_pieces | foe_pieces)
+    moves_bb = 0x0
+    for dir_ in bb.DIRECTIONS:
+        candidates = foe_pieces & bb.shift(my_pieces, dir_)
+        while candidates != 0:
+            shifted = bb.shift(candidates, dir_)
+            moves_bb |= empty & shifted
+            candidates = foe_pieces & shifted
+    return moves_bb
+
+
+def _flip_mask(my_pieces: int, foe_pieces: int, pos_mask: int) -> int:
+    """Return the bitboard of pieces captured by playing at `pos_mask`.
+
+    Raises an IllegalMoveError if the move captures nothing.
+    """
+    if (my_pieces | foe_pieces) & pos_mask:
+        raise IllegalMoveError
+    flips = 0x0
+    for dir_ in bb.DIRECTIONS:
+        line = 0x0
+        cursor = bb.shift(pos_mask, dir_)
+        while cursor & foe_pieces:
+            line |= cursor
+            cursor = bb.shift(cursor, dir_)
+        if cursor & my_pieces:
+            flips |= line
+    if not flips:
+        raise IllegalMoveError
+    return flips
 
 
 class Board:
@@ -18,9 +54,50 @@ class Board:
         init_turn_player_color=Color.black,
     ):
         """Construct a board with initial white and black pieces and turn player."""
-        self.white = init_white
-        self.black = init_black
+        self._white = init_white
+        self._black = init_black
         self.turn_player_color = init_turn_player_color
+        # Evaluation features kept up to date by place and undo if tracked
+        self.features: Optional[FeatureState] = None
+        self._forget_derived_state()
+
+    @property
+    def white(self) -> int:
+        """Bitboard of white's pieces."""
+        return self._white
+
+    @white.setter
+    def white(self, pieces: int):
+        self._white = pieces
+        self._pieces_set()
+
+    @property
+    def black(self) -> int:
+        """Bitboard of black's pieces."""
+        return self._black
+
+    @black.setter
+    def black(self, pieces: int):
+        self._black = pieces
+        self._pieces_set()
+
+    def _pieces_set(self):
+        """Bring derived state up to date after pieces were set directly."""
+        self._forget_derived_state()
+        if self.features is not None:
+            self.track_features()
+
+    def _forget_derived_state(self):
+        """Forget state derived from the pieces after they change."""
+        # Move masks of black and white, computed together on first use. They
+        # do not depend on the turn player so they survive swapping turns
+        self._move_masks: Optional[tuple[int, int]] = None
+        self._empty: Optional[int] = None
+        self._valid_moves: dict[Color, list[bb.Position]] = {}
+
+    def track_features(self):
+        """Maintain evaluation features of this board as moves are made."""
+        self.features = FeatureState(self._white, self._black)
 
     def swap_turn_players(self):
         """Swap current turn player."""
@@ -31,91 +108,99 @@ class Board:
 
     def empty_cells(self) -> int:
         """Return a bitboard representing empty cells."""
-        return bb.not_(self.white | self.black)
+        if self._empty is None:
+            self._empty = bb.not_(self._white | self._black)
+        return self._empty
+
+    def move_mask(self, color: Optional[Color] = None) -> int:
+        """Return a bitboard of the valid moves of `color` or the turn player."""
+        if self._move_masks is None:
+            self._move_masks = (
+                _move_mask(self._black, self._white),
+                _move_mask(self._white, self._black),
+            )
+        color = color or self.turn_player_color
+        return self._move_masks[0 if color is Color.black else 1]
 
     def valid_moves(self) -> list[bb.Position]:
         """Return a list of positions of valid moves for the turn player."""
-        if self.turn_player_color is Color.black:
-            my_pieces = self.black
-            foe_pieces = self.white
-        else:
-            my_pieces = self.white
-            foe_pieces = self.black
-        moves_bb = 0x0
-        for dir_ in bb.DIRECTIONS:
-            candidates = foe_pieces & bb.shift(my_pieces, dir_)
-            while candidates != 0:
-                shifted = bb.shift(candidates, dir_)
-                moves_bb |= self.empty_cells() & shifted
-                candidates = foe_pieces & shifted
-        return bb.to_list(moves_bb)
-
-    def place(self, color: Color, pos: bb.Position):
+        color = self.turn_player_color
+        moves = self._valid_moves.get(color)
+        if moves is None:
+            moves = self._valid_moves[color] = bb.to_list(self.move_mask(color))
+        return list(moves)
+
+    def must_pass(self) -> bool:
+        """Return True if the turn player has no valid moves."""
+        return self.move_mask() == 0
+
+    def is_game_over(self) -> bool:
+        """Return True if neither player has a valid move."""
+        return self.move_mask(Color.black) == 0 and self.move_mask(Color.white) == 0
+
+    def place(self, color: Color, pos: bb.Position) -> int:
         """Place a piece of color `color` at position `pos`.
 
-        Raises an IllegalMoveError if an illegal move was attempted
+        Returns the bitboard of captured pieces, which `undo` takes to take
+        the move back. Raises an IllegalMoveError if an illegal move was
+        attempted
         """
         assert 0 <= pos.row < 8
         assert 0 <= pos.col < 8
         pos_mask = bb.pos_mask(*pos)
-        self._capture(color, pos)
+        flips = self._capture(color, pos)
+        if color is Color.black:
+            self._black |= pos_mask
+        else:
+            self._white |= pos_mask
+        self._forget_derived_state()
+        if self.features is not None:
+            self.features.play(color, square_of(pos), flips)
+        return flips
+
+    def undo(self, color: Color, pos: bb.Position, flips: int):
+        """Take back the piece `color` placed at `pos` capturing `flips`."""
+        pos_mask = bb.pos_mask(*pos)
         if color is Color.black:
-            self.black |= pos_mask
+            self._black &= bb.not_(pos_mask | flips)
+            self._white |= flips
         else:
-            self.white |= pos_mask
+            self._white &= bb.not_(pos_mask | flips)
+            self._black |= flips
+        self._forget_derived_state()
+        if self.features is not None:
+            self.features.undo(color, square_of(pos), flips)
 
-    def _capture(self, color: Color, pos: bb.Position):
+    def _capture(self, color: Color, pos: bb.Position) -> int:
         """Find pieces that should be captured.
 
         It does this by playing `color` at `pos` and capture those pieces.
-        Raises an IllegalMoveError if an illegal move was attempted.
+        Returns the captured pieces. Raises an IllegalMoveError if an illegal
+        move was attempted.
         """
-        my_pieces = self.white if color is Color.white else self.black
-        empty = self.empty_cells()
-
-        class State:
-            def __init__(self, dir_, init_bb=0x0):
-                self.bb = init_bb
-                self.dir = dir_
-                self.capped = False
-                self.on_edge = False
-                self.on_empty = False
-
-            def dilate(self):
-                self.bb = bb.dilate(self.bb, self.dir)
-
-            def should_commit(self):
-                return self.capped
-
-            def should_keep_dilating(self):
-                selected = bb.not_(bb.pos_mask(*pos)) & self.bb
-                self.on_edge = len(set(self.dir) & set(bb.on_edge(self.bb))) > 0
-                self.capped = my_pieces & selected != 0
-                self.on_empty = empty & selected != 0
-                return not self.on_edge and not self.capped and not self.on_empty
-
-        start = bb.pos_mask(*pos)
-        states = [State(dir_, start) for dir_ in bb.DIRECTIONS]
-        did_commit = False
-        for state in states:
-            while state.should_keep_dilating():
-                state.dilate()
-            if state.should_commit():
-                did_commit = True
-                if color is Color.white:
-                    self.white |= state.bb
-                    self.black &= bb.not_(state.bb)
-                elif color is Color.black:
-                    self.black |= state.bb
-                    self.white &= bb.not_(state.bb)
-        if not did_commit:
-            raise IllegalMoveError
+        if color is Color.white:
+            flips = _flip_mask(self._white, self._black, bb.pos_mask(*pos))
+            self._white |= flips
+            self._black &= bb.not_(flips)
+        else:
+            flips = _flip_mask(self._black, self._white, bb.pos_mask(*pos))
+            self._black |= flips
+            self._white &= bb.not_(flips)
+        return flips
 
     def copy(self):
         """Return a shallow copy of this board."""
-        return copy(self)
+        res = copy(self)
+        # The copy keeps the cached moves but must not share the dict holding
+        # them, which each board fills in as it is asked
+        res._valid_moves = dict(self._valid_moves)
+        if self.features is not None:
+            res.features = self.features.copy()
+        return res
 
     def __eq__(self, other: "Board"):
+        if not isinstance(other, Board):
+            return NotImplemented
         return (
             self.white == other.white
             and self.black == other.black
@@ -134,3 +219,215 @@ class Board:
 
         res = [symbol_at(r, c) for r in range(8) for c in range(8)]
         return "\n".join(re.findall("........", "".join(res)))
+
+
+_BLACK_TO_MOVE = 0
+_WHITE_TO_MOVE = 1
+_TURN_COLORS = (Color.black, Color.white)
+_TURN_SYMBOLS = "XO"
+PACKED_SIZE = 17
+
+
+class CompactBoard:
+    """A small, hashable board with the same interface as `Board`.
+
+    The side to move is stored as an int, 0 for black and 1 for white, and the
+    board can be packed into 17 bytes or written as text. Apart from tracked
+    features nothing derived from the pieces is kept, so unlike those of a
+    `Board` the pieces are plain attributes. Compact boards are equal to
+    compact boards holding the same position.
+    """
+
+    __slots__ = ("white", "black", "turn", "features")
+
+    def __init__(
+        self,
+        white=0x0000001008000000,
+        black=0x0000000810000000,
+        turn=_BLACK_TO_MOVE,
+    ):
+        """Construct a board with white and black pieces and the side to move."""
+        self.white = white
+        self.black = black
+        self.turn = turn
+        # Evaluation features kept up to date by place and undo if tracked
+        self.features: Optional[FeatureState] = None
+
+    def track_features(self):
+        """Maintain evaluation features of this board as moves are made."""
+        self.features = FeatureState(self.white, self.black)
+
+    @classmethod
+    def from_board(cls, board) -> "CompactBoard":
+        """Return a compact board holding the position of `board`."""
+        turn = (
+            _BLACK_TO_MOVE if board.turn_player_color is Color.black else _WHITE_TO_MOVE
+        )
+        return cls(board.white, board.black, turn)
+
+    def to_board(self) -> Board:
+        """Return a `Board` holding this position."""
+        return Board(self.white, self.black, _TURN_COLORS[self.turn])
+
+    @property
+    def turn_player_color(self) -> Color:
+        """Color of the player to move."""
+        return _TURN_COLORS[self.turn]
+
+    @turn_player_color.setter
+    def turn_player_color(self, color: Color):
+        self.turn = _BLACK_TO_MOVE if color is Color.black else _WHITE_TO_MOVE
+
+    def swap_turn_players(self):
+        """Swap current turn player."""
+        self.turn ^= 1
+
+    def empty_cells(self) -> int:
+        """Return a bitboard representing empty cells."""
+        return bb.not_(self.white | self.black)
+
+    def move_mask(self, color: Optional[Color] = None) -> int:
+        """Return a bitboard of the valid moves of `color` or the turn player."""
+        color = color or self.turn_player_color
+        if color is Color.black:
+            return _move_mask(self.black, self.white)
+        return _move_mask(self.white, self.black)
+
+    def valid_moves(self) -> list[bb.Position]:
+        """Return a list of positions of valid moves for the turn player."""
+        return bb.to_list(self.move_mask())
+
+    def must_pass(self) -> bool:
+        """Return True if the turn player has no valid moves."""
+        return self.move_mask() == 0
+
+    def is_game_over(self) -> bool:
+        """Return True if neither player has a valid move."""
+        return (
+            _move_mask(self.black, self.white) == 0
+            and _move_mask(self.white, self.black) == 0
+        )
+
+    def place(self, color: Color, pos: bb.Position) -> int:
+        """Place a piece of color `color` at position `pos`.
+
+        Returns the bitboard of captured pieces, which `undo` takes to take
+        the move back. Raises an IllegalMoveError if an illegal move was
+        attempted
+        """
+        pos_mask = bb.pos_mask(*pos)
+        if color is Color.black:
+            flips = _flip_mask(self.black, self.white, pos_mask)
+            self.black |= flips | pos_mask
+            self.white &= bb.not_(flips)
+        else:
+            flips = _flip_mask(self.white, self.black, pos_mask)
+            self.white |= flips | pos_mask
+            self.black &= bb.not_(flips)
+        if self.features is not None:
+            self.features.play(color, square_of(pos), flips)
+        return flips
+
+    def undo(self, color: Color, pos: bb.Position, flips: int):
+        """Take back the piece `color` placed at `pos` capturing `flips`."""
+        pos_mask = bb.pos_mask(*pos)
+        if color is Color.black:
+            self.black &= bb.not_(pos_mask | flips)
+            self.white |= flips
+        else:
+            self.white &= bb.not_(pos_mask | flips)
+            self.black |= flips
+        if self.features is not None:
+            self.features.undo(color, square_of(pos), flips)
+
+    def copy(self) -> "CompactBoard":
+        """Return a copy of this board."""
+        res = CompactBoard(self.white, self.black, self.turn)
+        if self.features is not None:
+            res.features = self.features.copy()
+        return res
+
+    def canonical(self) -> tuple["CompactBoard", int]:
+        """
+        Return the least of the symmetric forms of this board and its transform.
+
+        See `bitboard.canonical`. The transform is the number of the transform
+        that maps this board, and its moves, to the returned board.
+        """
+        white, black, transform = bb.canonical(self.white, self.black)
+        return CompactBoard(white, black, self.turn), transform
+
+    def to_bytes(self) -> bytes:
+        """Return this position packed into `PACKED_SIZE` bytes.
+
+        White's and black's bitboards are written big-endian followed by a byte
+        for the side to move.
+        """
+        return (
+            self.white.to_bytes(8, "big")
+            + self.black.to_bytes(8, "big")
+            + bytes((self.turn,))
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactBoard":
+        """Return the board packed into `data` by `to_bytes`."""
+        if len(data) != PACKED_SIZE or data[16] not in (0, 1):
+            raise ValueError(f"Invalid packed board: {data!r}")
+        return cls(
+            int.from_bytes(data[:8], "big"), int.from_bytes(data[8:16], "big"), data[16]
+        )
+
+    def to_text(self) -> str:
+        """Return this position written as text.
+
+        The 64 cells are listed row by row from a1 with ``X`` for black, ``O``
+        for white and ``-`` for an empty cell, followed by a space and the
+        symbol of the player to move.
+        """
+        cells = []
+        for r in range(8):
+            for c in range(8):
+                mask = bb.pos_mask(r, c)
+                if self.white & mask:
+                    cells.append("O")
+                elif self.black & mask:
+                    cells.append("X")
+                else:
+                    cells.append("-")
+        return f"{''.join(cells)} {_TURN_SYMBOLS[self.turn]}"
+
+    @classmethod
+    def from_text(cls, text: str) -> "CompactBoard":
+        """Return the board written in `text` by `to_text`."""
+        cells, _, turn = text.strip().partition(" ")
+        turn = turn.strip()
+        if len(cells) != 64 or set(cells) - set("XO-") or turn not in ("X", "O"):
+            raise ValueError(f"Invalid board: {text!r}")
+        white = black = 0x0
+        for i, cell in enumerate(cells):
+            if cell == "O":
+                white |= bb.pos_mask(*divmod(i, 8))
+            elif cell == "X":
+                black |= bb.pos_mask(*divmod(i, 8))
+        return cls(white, black, _TURN_SYMBOLS.index(turn))
+
+    def __eq__(self, other):
+        # Boards are unhashable, so being equal to one would break the
+        # contract between equality and hashing
+        if not isinstance(other, CompactBoard):
+            return NotImplemented
+        return (
+            self.white == other.white
+            and self.black == other.black
+            and self.turn == other.turn
+        )
+
+    def __hash__(self):
+        # Hashes of ints are not randomized, so this is stable across runs
+        return hash((self.white, self.black, self.turn))
+
+    def __repr__(self):
+        return f"{type(self).__name__}.from_text({self.to_text()!r})"
+
+    __str__ = Board.__str__
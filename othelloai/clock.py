@@ -0,0 +1,121 @@
+"""Game clocks and time controls."""
+
+import re
+import time
+from math import exp, inf
+from typing import Optional
+
+_SECONDS = r"\d+(?:\.\d*)?"
+_TIME_CONTROL_RE = re.compile(
+    rf"/(?P<move>{_SECONDS})|(?P<base>{_SECONDS})(?:\+(?P<inc>{_SECONDS}))?"
+)
+
+
+class TimeControl:
+    """
+    Time limits of a game.
+
+    A game can be played under sudden death (`initial` seconds for the whole
+    game), with an `increment` added after each move, or with a fixed
+    `move_time` for every move.
+    """
+
+    def __init__(
+        self,
+        initial: float = inf,
+        increment: float = 0.0,
+        move_time: Optional[float] = None,
+    ):
+        self.initial = initial
+        self.increment = increment
+        self.move_time = move_time
+
+    @classmethod
+    def parse(cls, spec: str) -> "TimeControl":
+        """
+        Return the time control written in `spec`.
+
+        ``300`` is sudden death, ``300+2`` adds an increment and ``/5`` is a
+        fixed time per move. All times are in seconds.
+        """
+        match = _TIME_CONTROL_RE.fullmatch(spec.strip())
+        if match is None:
+            raise ValueError(f"Invalid time control: {spec!r}")
+        if match["move"] is not None:
+            return cls(move_time=float(match["move"]))
+        return cls(float(match["base"]), float(match["inc"] or 0))
+
+    def __str__(self):
+        if self.move_time is not None:
+            return f"/{self.move_time:g}"
+        if self.increment:
+            return f"{self.initial:g}+{self.increment:g}"
+        return f"{self.initial:g}"
+
+
+class Clock:
+    """A player's clock under a time control."""
+
+    def __init__(self, time_control: TimeControl):
+        self.time_control = time_control
+        self._remaining = (
+            time_control.move_time
+            if time_control.move_time is not None
+            else time_control.initial
+        )
+        self._started_at: Optional[float] = None
+
+    def start(self):
+        """Start the clock for a move."""
+        assert self._started_at is None, "Clock already running"
+        if self.time_control.move_time is not None:
+            self._remaining = self.time_control.move_time
+        self._started_at = time.monotonic()
+
+    def stop(self):
+        """Stop the clock after a move, adding the increment unless flagged."""
+        assert self._started_at is not None, "Clock not running"
+        self._remaining -= time.monotonic() - self._started_at
+        self._started_at = None
+        if not self.flagged:
+            self._remaining += self.time_control.increment
+
+    def time_left(self) -> float:
+        """Return the seconds left on the clock."""
+        if self._started_at is None:
+            return self._remaining
+        return self._remaining - (time.monotonic() - self._started_at)
+
+    @property
+    def flagged(self) -> bool:
+        """True if the clock ran out of time."""
+        return self.time_left() <= 0
+
+
+def _phase_weight(empties: int) -> float:
+    """Return the share of thinking time a move with `empties` empties gets."""
+    # Moves around the middle of the game decide most games, while early
+    # moves are well understood and late ones are quick to search
+    return 0.5 + 1.5 * exp(-(((empties - 32) / 12) ** 2))
+
+
+def allocate_time(clock: Clock, empties: int) -> float:
+    """
+    Return the seconds a player should spend on a move.
+
+    Under a fixed move time almost all of it is used. Otherwise the time left
+    is shared out over the player's remaining moves weighted by game phase, so
+    that more of it goes to the middlegame.
+    """
+    time_left = clock.time_left()
+    time_control = clock.time_control
+    if time_control.move_time is not None:
+        return 0.9 * time_left
+    if time_left == inf:
+        return inf
+    # Keep some time in reserve for the overhead of each remaining move
+    my_empties = range(empties, 0, -2)
+    reserve = min(0.05 * time_left, 0.01 * len(my_empties))
+    weights = [_phase_weight(e) for e in my_empties]
+    share = (time_left - reserve) * weights[0] / sum(weights) if weights else 0
+    return max(0.0, min(share + 0.8 * time_control.increment, 0.5 * time_left))
@@ -0,0 +1,505 @@
+"""
+Distribute engine jobs over workers on several machines.
+
+A coordinator holds a list of jobs and hands them out in batches to workers
+that connect to it over TCP. Jobs are games between two engines, self-play
+being a game of an engine against itself, and positions to analyze. Workers
+send heartbeats while they work. If a worker disconnects or misses heartbeats
+its batch is queued again for another worker. Each result is appended to a
+single JSON lines output file as it arrives. A job that raises an error on a
+worker is recorded as failed with the error rather than queued again, since
+it would fail the same way on every worker.
+
+Messages are JSON objects, one per line, with a ``type`` of ``hello``,
+``request``, ``heartbeat`` or ``result`` from workers and ``batch``, ``wait``
+or ``done`` from the coordinator.
+
+Usage: python -m othelloai.distributed coordinator -o results.jsonl --selfplay ENGINE
+       python -m othelloai.distributed worker HOST:PORT
+"""
+
+import json
+import logging
+import socket
+import socketserver
+import threading
+import time
+from argparse import ArgumentParser
+from collections import deque
+from itertools import count
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from .ai import ai_options
+from .board import CompactBoard
+from .clock import TimeControl
+from .color import Color
+from .game import Game
+from .match import make_player, opening_transcripts, parse_engine, read_openings
+from .record import format_move, format_moves, parse_moves, position_after
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 5555
+# Seconds between heartbeats of a busy worker
+HEARTBEAT_INTERVAL = 2.0
+# Seconds of silence after which a worker is considered lost
+HEARTBEAT_TIMEOUT = 10.0
+# Seconds an idle worker waits before asking for work again
+RETRY_INTERVAL = 0.5
+
+
+def game_job(
+    black: str,
+    white: str,
+    opening: str = "",
+    time_control: Optional[TimeControl] = None,
+) -> dict:
+    """Return a job playing a game between two engines from an opening."""
+    return dict(
+        kind="game",
+        black=black,
+        white=white,
+        opening=opening,
+        time_control=str(time_control) if time_control is not None else None,
+    )
+
+
+def selfplay_jobs(
+    engine: str,
+    openings: Iterable[str],
+    time_control: Optional[TimeControl] = None,
+) -> list[dict]:
+    """Return jobs playing `engine` against itself from each opening."""
+    return [game_job(engine, engine, opening, time_control) for opening in openings]
+
+
+def match_jobs(
+    engine_a: str,
+    engine_b: str,
+    openings: Iterable[str],
+    time_control: Optional[TimeControl] = None,
+) -> list[dict]:
+    """Return jobs playing both colors of each opening between two engines."""
+    jobs = []
+    for opening in openings:
+        jobs.append(game_job(engine_a, engine_b, opening, time_control))
+        jobs.append(game_job(engine_b, engine_a, opening, time_control))
+    return jobs
+
+
+def analysis_job(engine: str, board, depth: int) -> dict:
+    """Return a job analyzing `board` to `depth` with `engine`."""
+    return dict(
+        kind="analyze",
+        engine=engine,
+        position=CompactBoard.from_board(board).to_text(),
+        depth=depth,
+    )
+
+
+def run_job(job: dict) -> dict:
+    """Run a job and return its result."""
+    if job["kind"] == "game":
+        opening = parse_moves(job["opening"])
+        time_control = (
+            TimeControl.parse(job["time_control"])
+            if job.get("time_control") is not None
+            else None
+        )
+        black = make_player(job["black"], Color.black)
+        white = make_player(job["white"], Color.white)
+        game = Game(black, white, position_after(opening), time_control)
+        game.loop()
+        board = game.board
+        return dict(
+            winner=game.winner.name if game.winner is not None else None,
+            black_discs=board.black.bit_count(),
+            white_discs=board.white.bit_count(),
+            transcript=format_moves(opening + game.moves),
+        )
+    elif job["kind"] == "analyze":
+        ai, options = parse_engine(job["engine"])
+        options.pop("depth", None)
+        board = CompactBoard.from_text(job["position"]).to_board()
+        player = ai_options[ai](board.turn_player_color, job["depth"], **options)
+        score, move = player.analyze(board, job["depth"])
+        return dict(
+            score=score,
+            move=format_move(move) if move is not None else None,
+            nodes=player.nodes,
+        )
+    raise ValueError(f"Unknown job kind: {job['kind']!r}")
+
+
+def _send(f, message: dict):
+    f.write(json.dumps(message).encode() + b"\n")
+    f.flush()
+
+
+def _receive(f) -> Optional[dict]:
+    """
+    Return the next message or None if the connection was closed.
+
+    Raises a ValueError if the message is not a JSON object.
+    """
+    line = f.readline()
+    if not line:
+        return None
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError(f"Malformed message: {message!r}")
+    return message
+
+
+class Coordinator:
+    """Hands out jobs to workers and collects their results."""
+
+    def __init__(
+        self,
+        jobs: Iterable[dict],
+        output: Union[str, Path],
+        host: str = "",
+        port: int = DEFAULT_PORT,
+        batch_size: int = 4,
+        heartbeat_timeout: float = HEARTBEAT_TIMEOUT,
+    ):
+        """
+        Construct a coordinator of `jobs` listening on `host` and `port`.
+
+        Port 0 picks a free port, see `address`. Results are appended to
+        `output`. Workers are given up to `batch_size` jobs at a time.
+        """
+        self._jobs = dict(enumerate(jobs))
+        self._pending = deque(self._jobs)
+        self._done: set[int] = set()
+        self._failed: set[int] = set()
+        self._batch_ids = count()
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        if not self._jobs:
+            self._finished.set()
+        self._output = open(output, "a")
+        self.batch_size = batch_size
+        self.heartbeat_timeout = heartbeat_timeout
+        self._server = _Server((host, port), _WorkerHandler, self)
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """Host and port the coordinator listens on."""
+        return self._server.server_address[:2]
+
+    @property
+    def remaining(self) -> int:
+        """Number of jobs that have neither a result nor failed yet."""
+        with self._lock:
+            return len(self._jobs) - len(self._done)
+
+    @property
+    def failed(self) -> int:
+        """Number of jobs that failed."""
+        with self._lock:
+            return len(self._failed)
+
+    def serve(self, timeout: Optional[float] = None) -> bool:
+        """
+        Serve workers until every job is done or `timeout` seconds pass.
+
+        Returns True if every job has a result or failed.
+        """
+        server_thread = threading.Thread(
+            target=self._server.serve_forever, name="Coordinator", daemon=True
+        )
+        server_thread.start()
+        try:
+            return self._finished.wait(timeout)
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            self._output.close()
+
+    def _take_batch(self) -> Optional[tuple[int, dict[int, dict]]]:
+        """Return a batch id and jobs to hand out, or None if none are pending."""
+        with self._lock:
+            jobs = {}
+            while self._pending and len(jobs) < self.batch_size:
+                job_id = self._pending.popleft()
+                if job_id not in self._done:
+                    jobs[job_id] = self._jobs[job_id]
+            if not jobs:
+                return None
+            return next(self._batch_ids), jobs
+
+    def _requeue(self, job_ids: Iterable[int]):
+        with self._lock:
+            lost = [job_id for job_id in job_ids if job_id not in self._done]
+            self._pending.extendleft(reversed(lost))
+        if lost:
+            _logger.warning("Requeued %d jobs of a lost worker", len(lost))
+
+    def _record(self, worker: str, results: dict[str, dict], errors: dict[str, str]):
+        """Write the results and errors of jobs, keyed by job id."""
+        outcomes = [("result", item) for item in results.items()]
+        outcomes += [("error", item) for item in errors.items()]
+        with self._lock:
+            for key, (job_id, outcome) in outcomes:
+                job_id = int(job_id)
+                # A requeued job may finish twice, keep the first result
+                if job_id in self._done:
+                    continue
+                self._done.add(job_id)
+                if key == "error":
+                    self._failed.add(job_id)
+                    _logger.error("Job %d failed on %s: %s", job_id, worker, outcome)
+                line = dict(id=job_id, job=self._jobs[job_id], worker=worker)
+                line[key] = outcome
+                self._output.write(json.dumps(line) + "\n")
+            self._output.flush()
+            if len(self._done) == len(self._jobs):
+                self._finished.set()
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, handler, coordinator: Coordinator):
+        self.coordinator = coordinator
+        super().__init__(address, handler)
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    """Serves one worker connection."""
+
+    def handle(self):
+        coordinator: Coordinator = self.server.coordinator
+        self.request.settimeout(coordinator.heartbeat_timeout)
+        worker = f"{self.client_address[0]}:{self.client_address[1]}"
+        in_flight: dict[int, list[int]] = {}
+        try:
+            while True:
+                message = _receive(self.rfile)
+                if message is None:
+                    break
+                kind = message.get("type")
+                if kind == "hello":
+                    worker = message.get("worker") or worker
+                    _logger.info("Worker %s connected", worker)
+                elif kind == "request":
+                    self._hand_out(coordinator, in_flight)
+                elif kind == "result":
+                    in_flight.pop(message["batch"], None)
+                    coordinator._record(
+                        worker, message["results"], message.get("errors", {})
+                    )
+                elif kind != "heartbeat":
+                    raise ValueError(f"Unknown message type: {kind!r}")
+        except KeyError as e:
+            _logger.warning("Lost worker %s: message without %s", worker, e)
+        except (OSError, ValueError) as e:
+            _logger.warning("Lost worker %s: %s", worker, e)
+        finally:
+            for job_ids in in_flight.values():
+                coordinator._requeue(job_ids)
+
+    def _hand_out(self, coordinator: Coordinator, in_flight: dict[int, list[int]]):
+        if coordinator._finished.is_set():
+            _send(self.wfile, dict(type="done"))
+            return
+        batch = coordinator._take_batch()
+        if batch is None:
+            # Other workers hold the remaining jobs but may yet be lost
+            _send(self.wfile, dict(type="wait", retry=RETRY_INTERVAL))
+            return
+        batch_id, jobs = batch
+        in_flight[batch_id] = list(jobs)
+        _send(self.wfile, dict(type="batch", batch=batch_id, jobs=jobs))
+
+
+class _Heartbeat:
+    """Sends heartbeats on a connection while a batch is being worked on."""
+
+    def __init__(self, f, send_lock: threading.Lock, interval: float):
+        self._f = f
+        self._send_lock = send_lock
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                with self._send_lock:
+                    _send(self._f, dict(type="heartbeat"))
+            except OSError:
+                return
+
+    def __enter__(self):
+        self._thread.start()
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+
+def run_worker(
+    host: str,
+    port: int = DEFAULT_PORT,
+    name: Optional[str] = None,
+    heartbeat_interval: float = HEARTBEAT_INTERVAL,
+    connect_timeout: float = 30.0,
+) -> int:
+    """
+    Run jobs from the coordinator at `host` and `port` until it is done.
+
+    Connecting is retried for up to `connect_timeout` seconds so that workers
+    may start before the coordinator. Jobs that raise an error are reported
+    to the coordinator as failed. Returns the number of jobs run. Raises a
+    ValueError on a message the worker does not understand.
+    """
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            connection = socket.create_connection((host, port))
+            break
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(RETRY_INTERVAL)
+
+    name = name or f"{socket.gethostname()}-{threading.get_native_id()}"
+    send_lock = threading.Lock()
+    jobs_run = 0
+    rfile = connection.makefile("rb")
+    wfile = connection.makefile("wb")
+    with connection, rfile, wfile:
+        with send_lock:
+            _send(wfile, dict(type="hello", worker=name))
+        while True:
+            with send_lock:
+                _send(wfile, dict(type="request"))
+            message = _receive(rfile)
+            kind = message.get("type") if message is not None else "done"
+            if kind == "done":
+                break
+            if kind == "wait":
+                time.sleep(message.get("retry", RETRY_INTERVAL))
+                continue
+            if kind != "batch":
+                raise ValueError(f"Unknown message type: {kind!r}")
+            results, errors = {}, {}
+            with _Heartbeat(wfile, send_lock, heartbeat_interval):
+                for job_id, job in message["jobs"].items():
+                    try:
+                        results[job_id] = run_job(job)
+                    except Exception as e:
+                        _logger.exception("Job %s failed", job_id)
+                        errors[job_id] = f"{type(e).__name__}: {e}"
+            jobs_run += len(results) + len(errors)
+            with send_lock:
+                _send(
+                    wfile,
+                    dict(
+                        type="result",
+                        batch=message["batch"],
+                        results=results,
+                        errors=errors,
+                    ),
+                )
+    _logger.info("Worker %s ran %d jobs", name, jobs_run)
+    return jobs_run
+
+
+def _parse_address(address: str) -> tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "localhost", int(port) if port else DEFAULT_PORT
+
+
+def main(argv: Optional[list[str]] = None):
+    """Entry point of the coordinator and worker."""
+    parser = ArgumentParser(description="Distribute engine jobs over machines")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    coordinator = commands.add_parser("coordinator", help="Hand out jobs")
+    coordinator.add_argument(
+        "-o", "--output", type=Path, required=True, help="JSON lines result file"
+    )
+    coordinator.add_argument("--host", default="", help="Address to listen on")
+    coordinator.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coordinator.add_argument("--batch-size", type=int, default=4)
+    coordinator.add_argument(
+        "--heartbeat-timeout", type=float, default=HEARTBEAT_TIMEOUT
+    )
+    jobs = coordinator.add_mutually_exclusive_group(required=True)
+    jobs.add_argument("--selfplay", metavar="ENGINE", help="Self-play games")
+    jobs.add_argument(
+        "--match", nargs=2, metavar="ENGINE", help="Games between two engines"
+    )
+    jobs.add_argument(
+        "--analyze", metavar="ENGINE", help="Analyze positions of a position file"
+    )
+    coordinator.add_argument("--openings", type=Path, help="Record file of openings")
+    coordinator.add_argument(
+        "--opening-plies",
+        type=int,
+        default=4,
+        help="Length of the generated openings if no opening file is given",
+    )
+    coordinator.add_argument(
+        "--games-per-opening", type=int, default=1, help="Repeat each opening"
+    )
+    coordinator.add_argument("--time-control", type=TimeControl.parse)
+    coordinator.add_argument(
+        "--positions", type=Path, help="File of positions, one per line as text"
+    )
+    coordinator.add_argument("-d", "--depth", type=int, default=4)
+
+    worker = commands.add_parser("worker", help="Run jobs")
+    worker.add_argument("address", help="Coordinator HOST:PORT")
+    worker.add_argument("--name", help="Worker name in the results")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        run_worker(*_parse_address(args.address), name=args.name)
+        return
+
+    if args.analyze is not None:
+        if args.positions is None:
+            parser.error("--analyze requires --positions")
+        with open(args.positions) as f:
+            boards = [
+                CompactBoard.from_text(line).to_board()
+                for line in f
+                if line.strip() and not line.startswith("#")
+            ]
+        job_list = [analysis_job(args.analyze, board, args.depth) for board in boards]
+    else:
+        openings = (
+            list(read_openings(args.openings))
+            if args.openings is not None
+            else opening_transcripts(args.opening_plies)
+        )
+        openings *= args.games_per_opening
+        if args.selfplay is not None:
+            job_list = selfplay_jobs(args.selfplay, openings, args.time_control)
+        else:
+            job_list = match_jobs(*args.match, openings, args.time_control)
+
+    server = Coordinator(
+        job_list,
+        args.output,
+        args.host,
+        args.port,
+        args.batch_size,
+        args.heartbeat_timeout,
+    )
+    _logger.info("Serving %d jobs on %s:%d", len(job_list), *server.address)
+    server.serve()
+    if server.failed:
+        _logger.warning("%d jobs failed, see %s", server.failed, args.output)
+
+
+if __name__ == "__main__":
+    logging.basicConfig()
+    _logger.setLevel(logging.INFO)
+    main()
@@ -0,0 +1,170 @@
+"""
+Evaluation features maintained incrementally as moves are played and undone.
+
+Squares are numbered ``row * 8 + col`` from a1. A pattern is a tuple of
+squares whose contents are encoded as a base 3 index, with 0 for an empty
+square, 1 for black and 2 for white, the first square being the least
+significant digit. Lookup tables map each square to the patterns it belongs
+to, so a move only updates the patterns of the squares it changes.
+"""
+
+from . import bitboard as bb
+from .color import Color, opposite_color
+
+_EMPTY, _BLACK, _WHITE = 0, 1, 2
+
+
+def _lines() -> list[tuple[int, ...]]:
+    rows = [tuple(r * 8 + c for c in range(8)) for r in range(8)]
+    cols = [tuple(r * 8 + c for r in range(8)) for c in range(8)]
+    diagonals = []
+    for offset in range(-4, 5):
+        diagonals.append(
+            tuple(r * 8 + r + offset for r in range(8) if 0 <= r + offset < 8)
+        )
+        diagonals.append(
+            tuple(r * 8 + 7 - r - offset for r in range(8) if 0 <= r + offset < 8)
+        )
+    return rows + cols + diagonals
+
+
+def _corners() -> list[tuple[int, ...]]:
+    corners = []
+    for rows in (range(3), range(7, 4, -1)):
+        for cols in (range(3), range(7, 4, -1)):
+            corners.append(tuple(r * 8 + c for r in rows for c in cols))
+    return corners
+
+
+# Every row, column, diagonal of at least four squares and 3x3 corner block
+PATTERNS = _lines() + _corners()
+
+# For each square, the (pattern, place value) pairs of the patterns it is in
+SQUARE_PATTERNS = [
+    [
+        (i, 3 ** pattern.index(square))
+        for i, pattern in enumerate(PATTERNS)
+        if square in pattern
+    ]
+    for square in range(64)
+]
+
+# Parity regions are the four quadrants of the board
+SQUARE_REGIONS = [(square // 32) * 2 + (square % 8) // 4 for square in range(64)]
+
+# End of the empty square list
+_END = 64
+
+
+def square_of(pos: bb.Position) -> int:
+    """Return the square number of `pos`."""
+    return pos.row * 8 + pos.col
+
+
+def squares(bits: int) -> list[int]:
+    """Return the square numbers of the on bits of `bits`."""
+    res = []
+    while bits:
+        low = bits & -bits
+        res.append(64 - low.bit_length())
+        bits ^= low
+    return res
+
+
+class FeatureState:
+    """
+    Evaluation features of a position.
+
+    Holds the number of discs of each color, the index of every pattern, the
+    parity of the number of empty squares in each region as a bit mask and a
+    doubly linked list of empty squares. `play` and `undo` update them from a
+    move and the discs it flipped.
+    """
+
+    __slots__ = ("discs", "pattern_indices", "parity", "_next", "_prev")
+
+    def __init__(self, white: int, black: int):
+        """Compute the features of the position with pieces `white` and `black`."""
+        self.discs = {Color.black: black.bit_count(), Color.white: white.bit_count()}
+        contents = [_EMPTY] * 64
+        for square in squares(black):
+            contents[square] = _BLACK
+        for square in squares(white):
+            contents[square] = _WHITE
+        self.pattern_indices = [
+            sum(contents[square] * 3**i for i, square in enumerate(pattern))
+            for pattern in PATTERNS
+        ]
+        self.parity = 0
+        # _next[_END] is the first empty square and _prev[_END] the last
+        self._next = [_END] * 65
+        self._prev = [_END] * 65
+        last = _END
+        for square in range(64):
+            if contents[square] == _EMPTY:
+                self.parity ^= 1 << SQUARE_REGIONS[square]
+                self._next[last] = square
+                self._prev[square] = last
+                last = square
+        self._next[last] = _END
+        self._prev[_END] = last
+
+    def empties(self) -> list[int]:
+        """Return the empty squares in ascending order."""
+        res = []
+        square = self._next[_END]
+        while square != _END:
+            res.append(square)
+            square = self._next[square]
+        return res
+
+    def play(self, color: Color, square: int, flips: int):
+        """Update the features after `color` plays at `square` flipping `flips`."""
+        flipped = squares(flips)
+        digit, step = (_BLACK, -1) if color is Color.black else (_WHITE, 1)
+        indices = self.pattern_indices
+        for i, value in SQUARE_PATTERNS[square]:
+            indices[i] += digit * value
+        for flip in flipped:
+            for i, value in SQUARE_PATTERNS[flip]:
+                indices[i] += step * value
+        self.discs[color] += len(flipped) + 1
+        self.discs[opposite_color(color)] -= len(flipped)
+        self.parity ^= 1 << SQUARE_REGIONS[square]
+        # Unlinked squares keep their links so that undo can relink them
+        self._next[self._prev[square]] = self._next[square]
+        self._prev[self._next[square]] = self._prev[square]
+
+    def undo(self, color: Color, square: int, flips: int):
+        """Revert the last `play`, called with the same arguments."""
+        flipped = squares(flips)
+        digit, step = (_BLACK, -1) if color is Color.black else (_WHITE, 1)
+        indices = self.pattern_indices
+        for i, value in SQUARE_PATTERNS[square]:
+            indices[i] -= digit * value
+        for flip in flipped:
+            for i, value in SQUARE_PATTERNS[flip]:
+                indices[i] -= step * value
+        self.discs[color] -= len(flipped) + 1
+        self.discs[opposite_color(color)] += len(flipped)
+        self.parity ^= 1 << SQUARE_REGIONS[square]
+        self._next[self._prev[square]] = square
+        self._prev[self._next[square]] = square
+
+    def copy(self) -> "FeatureState":
+        """Return an independent copy of these features."""
+        res = FeatureState.__new__(FeatureState)
+        res.discs = dict(self.discs)
+        res.pattern_indices = list(self.pattern_indices)
+        res.parity = self.parity
+        res._next = list(self._next)
+        res._prev = list(self._prev)
+        return res
+
+    def __eq__(self, other: "FeatureState"):
+        return (
+            self.discs == other.discs
+            and self.pattern_indices == other.pattern_indices
+            and self.parity == other.parity
+            and self.empties() == other.empties()
+        )
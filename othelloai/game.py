@@ -3,13 +3,19 @@
 import cProfile
 import enum
 import logging
+import math
 import threading
+import time
+from typing import Optional
 
 from .args import get_args
+from .bitboard import Position
 from .board import Board
-from .color import Color
+from .clock import Clock, TimeControl
+from .color import Color, opposite_color
 from .exception import IllegalMoveError, PassMove, PlayerInterrupted
 from .player import Player
+from .telemetry import Metrics
 
 _logger = logging.getLogger(__name__)
 
@@ -40,21 +46,44 @@ class Game:
         my_player: Player,
         opponent_player: Player,
         board: Board = None,
+        time_control: Optional[TimeControl] = None,
+        metrics: Optional[Metrics] = None,
     ):
+        """
+        Construct a game between two players.
+
+        The game starts from `board` if given and is played under
+        `time_control` if given. Telemetry of the game is recorded into
+        `metrics` if given.
+        """
         Game.game_counter += 1
+        self._number = Game.game_counter
         self._my_player = my_player
         self._opponent_player = opponent_player
         self._board = board if board is not None else Board()
         self._runner = threading.Thread(
             target=self._profile_loop if get_args().is_profiling_enabled else self.loop,
-            name=f"GameThread ({Game.game_counter})",
+            name=f"GameThread ({self._number})",
         )
         self._game_stopped_event = threading.Event()
+        # Interrupts the turn player when the game stops or their flag falls
+        self._move_interrupt = threading.Event()
+        self._flag_timer: Optional[threading.Timer] = None
+        self._winner: Optional[Color] = None
+        self._metrics = metrics
+        self._moves: list[Position] = []
+        # Seconds of the current loop iteration spent in players and observers
+        self._accounted_seconds = 0.0
+        self._clocks = (
+            {color: Clock(time_control) for color in Color}
+            if time_control is not None
+            else {}
+        )
 
     def _profile_loop(self):
         with cProfile.Profile() as profile:
             self.loop()
-        profile.dump_stats(get_args().profile_dir / "game-thread.profile")
+        profile.dump_stats(get_args().profile_dir / f"game-{self._number}.profile")
 
     def loop(self):
         """
@@ -71,25 +100,47 @@ class Game:
             if self._my_player.color is self._board.turn_player_color
             else self._opponent_player
         )
+        if self._metrics is not None:
+            game_key = self._metrics.start_game()
+        iteration_started_at = time.perf_counter()
+        # The turn player's clock runs from the start of their turn until a
+        # move or pass is accepted, across illegal moves and retries
+        interrupt: Optional[threading.Event] = None
+        clock: Optional[Clock] = None
         while not self._game_stopped_event.is_set() and not self._is_game_over():
+            self._observe_iteration(iteration_started_at)
+            iteration_started_at = time.perf_counter()
             _logger.info("Waiting for %s to make a move", turn_player)
 
+            if interrupt is None:
+                clock = self._clocks.get(turn_player.color)
+                interrupt = self._start_clock(clock)
             try:
-                move = turn_player.get_move(
-                    self._board.copy(), self._game_stopped_event
-                )
+                move = self._request_move(turn_player, interrupt, clock)
+                if clock is not None and clock.flagged:
+                    self._forfeit_on_time(turn_player)
+                    break
                 self._board.place(turn_player.color, move)
+                self._moves.append(move)
+                self._count("moves_total", turn_player)
                 self._notify(EventType.board_change, self._board.copy())
                 _logger.info("%s played %s", turn_player, move)
             except PassMove:
                 _logger.info("%s passed their move", turn_player)
+                self._count("passes_total", turn_player)
             except IllegalMoveError:
                 _logger.info("%s attempted an illegal move", turn_player)
+                self._count("illegal_moves_total", turn_player)
                 turn_player.signal_illegal_move_made()
                 continue
             except PlayerInterrupted:
+                if clock is not None and clock.flagged:
+                    self._forfeit_on_time(turn_player)
+                    break
                 _logger.debug("%s interrupted during their move", turn_player)
                 continue
+            self._stop_clock(clock)
+            interrupt = None
 
             # Swap turn players
             turn_player = (
@@ -99,8 +150,95 @@ class Game:
             )
             self._board.swap_turn_players()
             self._notify(EventType.turn_change, self._board.turn_player_color)
+        if interrupt is not None:
+            self._stop_clock(clock)
+
+        if self._metrics is not None:
+            self._observe_iteration(iteration_started_at)
+            self._metrics.finish_game(game_key)
+
+    def _request_move(
+        self, player: Player, interrupt: threading.Event, clock: Optional[Clock]
+    ) -> Position:
+        """Return the move of `player`, timing it if metrics are recorded."""
+        if self._metrics is None:
+            return player.get_move(self._board.copy(), interrupt, clock)
+        started_at = time.perf_counter()
+        try:
+            return player.get_move(self._board.copy(), interrupt, clock)
+        finally:
+            seconds = time.perf_counter() - started_at
+            self._accounted_seconds += seconds
+            self._metrics.observe("move_seconds", seconds, player=player.color.name)
+
+    def _count(self, name: str, player: Player):
+        if self._metrics is not None:
+            self._metrics.increment(name, player=player.color.name)
+
+    def _observe_iteration(self, started_at: float):
+        """Record the time of a loop iteration not spent in players or observers."""
+        if self._metrics is not None:
+            seconds = time.perf_counter() - started_at - self._accounted_seconds
+            self._metrics.observe("loop_seconds", max(seconds, 0.0))
+        self._accounted_seconds = 0.0
+
+    def _start_clock(self, clock: Optional[Clock]) -> threading.Event:
+        """Start the turn player's clock and return their interrupt."""
+        self._move_interrupt = threading.Event()
+        if self._game_stopped_event.is_set():
+            self._move_interrupt.set()
+        if clock is not None:
+            clock.start()
+        # An unbounded clock, such as one with only an increment, never falls
+        if clock is not None and not math.isinf(clock.time_left()):
+            self._flag_timer = threading.Timer(
+                max(clock.time_left(), 0), self._move_interrupt.set
+            )
+            self._flag_timer.daemon = True
+            self._flag_timer.start()
+        return self._move_interrupt
+
+    def _stop_clock(self, clock: Optional[Clock]):
+        if self._flag_timer is not None:
+            self._flag_timer.cancel()
+            self._flag_timer = None
+        if clock is not None:
+            clock.stop()
+
+    def _forfeit_on_time(self, player: Player):
+        _logger.info("%s ran out of time", player)
+        self._end_game(opposite_color(player.color))
+
+    def _end_game(self, winner: Optional[Color]):
+        self._winner = winner
+        self._notify(EventType.game_over, winner, self._board.copy())
+
+    @property
+    def winner(self) -> Optional[Color]:
+        """Color of the winner of a finished game, None if it was drawn."""
+        return self._winner
+
+    @property
+    def moves(self) -> list[Position]:
+        """Moves played so far in the game, not counting passes."""
+        return list(self._moves)
+
+    @property
+    def clocks(self) -> dict[Color, Clock]:
+        """Clock of each player, empty if the game has no time control."""
+        return self._clocks
 
     def _notify(self, e: EventType, *args):
+        if self._metrics is None:
+            self._dispatch(e, *args)
+            return
+        started_at = time.perf_counter()
+        self._dispatch(e, *args)
+        seconds = time.perf_counter() - started_at
+        self._accounted_seconds += seconds
+        self._metrics.observe("notify_seconds", seconds, event=e.name)
+
+    def _dispatch(self, e: EventType, *args):
         err_str = f"Incorrect arguments for {e}: {args}"
         if e is EventType.board_change:
             (board,) = args
@@ -122,30 +260,31 @@ class Game:
             assert False, f"{e} not implemented"
 
     def _is_game_over(self) -> bool:
-        filled = self._board.empty_cells() == 0  # No empty cells i.e. all spaces filled
-        no_white = self._board.white == 0
-        no_black = self._board.black == 0
-
-        if filled:
-            white_count = self._board.white.bit_count()
-            black_count = self._board.black.bit_count()
-            if white_count > black_count:
-                self._notify(EventType.game_over, Color.white, self._board.copy())
-            elif white_count < black_count:
-                self._notify(EventType.game_over, Color.black, self._board.copy())
-            else:
-                self._notify(EventType.game_over, None, self._board.copy())
-        elif no_white:
-            self._notify(EventType.game_over, Color.black, self._board.copy())
-        elif no_black:
-            self._notify(EventType.game_over, Color.white, self._board.copy())
-
-        return filled or no_white or no_black
+        # The game ends when neither player can move, which includes a full
+        # board and a player having no pieces left
+        if not self._board.is_game_over():
+            return False
+
+        white_count = self._board.white.bit_count()
+        black_count = self._board.black.bit_count()
+        if white_count > black_count:
+            self._end_game(Color.white)
+        elif white_count < black_count:
+            self._end_game(Color.black)
+        else:
+            self._end_game(None)
+        return True
+
+    @property
+    def board(self) -> Board:
+        """Copy of the current state of the board."""
+        return self._board.copy()
 
     def shutdown(self):
         """Cleanup resources required by the game and wait for completion."""
         assert not self._game_stopped_event.is_set(), "Game already shutdown"
         self._game_stopped_event.set()
+        self._move_interrupt.set()
         _logger.debug("Game stopped event set")
         self._runner.join()
         _logger.debug("Game stopped")
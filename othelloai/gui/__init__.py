@@ -7,16 +7,21 @@ from random import choice as choose_from
 from typing import Optional
 
 from .player import GUIPlayer
+from .updates import FRAME_RATE, UpdateQueue
 from .. import bitboard as bb
 from ..ai import ai_default, ai_options, AIOption
+from ..args import get_args
 from ..board import Board
 from ..color import Color, opposite_color
 from ..exception import OutOfTurnError
 from ..game import Game, GameType
+from ..telemetry import Metrics, MetricsExporter
 
 _logger = logging.getLogger(__name__)
 _game: Optional[Game] = None
 _my_player: Optional[GUIPlayer] = None
+_updates = UpdateQueue()
+_metrics: Optional[Metrics] = None
 
 
 class BoardView(tk.Canvas):
@@ -104,7 +109,7 @@ class NewGameDialog(tk.Toplevel):
     def __init__(self, parent, board_view: BoardView):
         super().__init__(parent)
         self.board_view = board_view
-        self.ai_settings = dict(depth=3)
+        self.ai_settings = dict(depth=3, probcut=False, lmr=False)
 
         # Frames
         self.frame = tk.Frame(self)
@@ -118,6 +123,8 @@ class NewGameDialog(tk.Toplevel):
         self.game_type_var = tk.StringVar(self.frame, GameType.computer.name)
         self.ai_var = tk.StringVar(self.frame, ai_default.name)
         self.depth_var = tk.IntVar(self.frame, self.ai_settings["depth"])
+        self.probcut_var = tk.BooleanVar(self.frame, self.ai_settings["probcut"])
+        self.lmr_var = tk.BooleanVar(self.frame, self.ai_settings["lmr"])
 
         # Radio buttons
         self.radiobutton_color_black = tk.Radiobutton(
@@ -168,6 +175,14 @@ class NewGameDialog(tk.Toplevel):
             increment=1,
         )
 
+        # Check buttons
+        self.checkbutton_probcut = tk.Checkbutton(
+            self.frame_ai_settings, text="ProbCut", variable=self.probcut_var
+        )
+        self.checkbutton_lmr = tk.Checkbutton(
+            self.frame_ai_settings, text="LMR", variable=self.lmr_var
+        )
+
         # Labels
         self.label_depth = tk.Label(self.frame_ai_settings, text="Depth:")
 
@@ -188,6 +203,16 @@ class NewGameDialog(tk.Toplevel):
             "write",
             callback=lambda *args: self.ai_settings.update(depth=self.depth_var.get()),
         )
+        self.probcut_var.trace_add(
+            "write",
+            callback=lambda *args: self.ai_settings.update(
+                probcut=self.probcut_var.get()
+            ),
+        )
+        self.lmr_var.trace_add(
+            "write",
+            callback=lambda *args: self.ai_settings.update(lmr=self.lmr_var.get()),
+        )
 
         self._layout()
 
@@ -215,10 +240,12 @@ class NewGameDialog(tk.Toplevel):
         ai = AIOption[self.ai_var.get()]
         if ai is AIOption.Randy:
             self.frame_ai_settings.grid_remove()
-        elif ai is AIOption.Marty:
+        elif ai in (AIOption.Marty, AIOption.Polly):
             self.frame_ai_settings.grid(row=1, column=0)
             self.label_depth.grid(row=0, column=0)
             self.spinbox_minmax_depth.grid(row=0, column=1)
+            self.checkbutton_probcut.grid(row=1, column=0, columnspan=2, sticky="w")
+            self.checkbutton_lmr.grid(row=2, column=0, columnspan=2, sticky="w")
         else:
             assert False
 
@@ -251,8 +278,9 @@ class NewGameDialog(tk.Toplevel):
 
         if _game is not None:
             _game.shutdown()
+        _updates.clear()
 
-        _game = Game(_my_player, opponent)
+        _game = Game(_my_player, opponent, metrics=_metrics)
         _game.start()
 
     def _make_my_player(self):
@@ -265,8 +293,8 @@ class NewGameDialog(tk.Toplevel):
         )
         _my_player = GUIPlayer(
             my_color,
-            self.board_view.redraw,
-            _show_winner,
+            _updates.post_board,
+            _updates.post_game_over,
         )
 
     def _make_opponent_player(self, color: Color):
@@ -292,6 +320,16 @@ def _show_winner(color: Optional[Color], _: Board):
     tk.messagebox.showinfo("Game Over", msg)
 
 
+def _poll_updates(root: tk.Tk, board_view: BoardView):
+    """Render the updates posted by the game thread and poll again next frame."""
+    board, game_over = _updates.drain()
+    if board is not None:
+        board_view.redraw(board)
+    root.after(1000 // FRAME_RATE, _poll_updates, root, board_view)
+    if game_over is not None:
+        _show_winner(*game_over)
+
+
 def _init_widgets(root: tk.Tk):
     root.title("Othello")
 
@@ -307,15 +345,25 @@ def _init_widgets(root: tk.Tk):
     menu_bar.add_cascade(label="Game", menu=game_menu)
     root.config(menu=menu_bar)
 
+    _poll_updates(root, board_view)
+
     # Immediately display a new game dialog
     NewGameDialog(root, board_view)
 
 
 def loop():
-    global _game
+    global _game, _metrics
 
     _logger.debug("Init ui loop")
 
+    args = get_args()
+    exporter = None
+    if args.telemetry_path is not None:
+        _metrics = Metrics()
+        exporter = MetricsExporter(
+            _metrics, args.telemetry_path, args.telemetry_interval
+        )
+        exporter.start()
     try:
         root = tk.Tk()
         _init_widgets(root)
@@ -323,3 +371,5 @@ def loop():
     finally:
         if _game is not None:
             _game.shutdown()
+        if exporter is not None:
+            exporter.stop()
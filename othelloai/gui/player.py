@@ -11,7 +11,11 @@ from ..player import Player
 
 
 class GUIPlayer(Player):
-    """Player that makes moves from the GUI."""
+    """
+    Player that makes moves from the GUI.
+
+    The callbacks are called from the game thread, so they must not use Tk.
+    """
 
     def __init__(
         self,
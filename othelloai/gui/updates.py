@@ -0,0 +1,56 @@
+"""
+Hand off game updates from the game thread to the Tk thread.
+
+Tk may only be used from the thread running its main loop, so the game
+thread posts updates here and the Tk thread drains them periodically with
+``after``. Board changes are coalesced: only the latest board posted since the
+last drain is kept, so the board is redrawn at most once per frame however
+fast the players move.
+"""
+
+import threading
+from collections import namedtuple
+from typing import Optional
+
+from ..board import Board
+from ..color import Color
+
+# Frames per second at which the GUI renders updates
+FRAME_RATE = 30
+
+GameOver = namedtuple("GameOver", "winner, board", module=__name__)
+
+
+class UpdateQueue:
+    """Latest board change and game over posted by the game thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._board: Optional[Board] = None
+        self._game_over: Optional[GameOver] = None
+
+    def post_board(self, board: Board):
+        """Post a board change, replacing any board not drained yet."""
+        with self._lock:
+            self._board = board
+
+    def post_game_over(self, winner: Optional[Color], board: Board):
+        """Post the end of the game."""
+        with self._lock:
+            self._board = board
+            self._game_over = GameOver(winner, board)
+
+    def drain(self) -> tuple[Optional[Board], Optional[GameOver]]:
+        """
+        Return and clear the pending board and game over.
+
+        Either is None if nothing of that kind was posted since the last drain.
+        """
+        with self._lock:
+            board, game_over = self._board, self._game_over
+            self._board = self._game_over = None
+        return board, game_over
+
+    def clear(self):
+        """Discard pending updates, e.g. those of a game that was replaced."""
+        self.drain()
@@ -0,0 +1,304 @@
+"""
+Index of the positions reached in game record files.
+
+Every position of every game in a set of record files is hashed and stored
+with the file, the byte offset of the game and the ply at which it was
+reached. Positions are canonicalized first, so that a position is found
+whichever of the eight symmetries of the board it was played in. If the turn
+player has to pass, the position is stored with the turn passed, as
+`othelloai.record.position_after` returns it.
+
+The index is a directory of segment files and a JSON manifest. Each segment
+holds fixed-size entries sorted by hash and is memory-mapped to be searched
+in O(log n). Games appended to the record files are indexed in a new
+segment by `PositionIndex.update`, and `PositionIndex.compact` merges the
+segments into one.
+
+Usage: python -m othelloai.index INDEX_DIR add RECORDS...
+       python -m othelloai.index INDEX_DIR lookup TRANSCRIPT
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from argparse import ArgumentParser
+from collections import namedtuple
+from heapq import merge
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+from . import bitboard as bb
+from .bitboard import Position
+from .board import Board, CompactBoard
+from .record import (
+    complete_lines_end,
+    format_move,
+    iter_records,
+    parse_moves,
+    position_after,
+    read_record_at,
+    replay,
+)
+
+_logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# Position hash, record file number, game offset and ply
+_ENTRY = struct.Struct(">QHQH")
+
+Occurrence = namedtuple(
+    "Occurrence", "path, offset, ply, next_move, score", module=__name__
+)
+
+
+def _with_turn_to_move(board: Board) -> Board:
+    """Return `board` with the turn passed if its turn player has to pass."""
+    if board.valid_moves():
+        return board
+    passed = board.copy()
+    passed.swap_turn_players()
+    return passed if passed.valid_moves() else board
+
+
+def _canonical(board: Board) -> tuple[bytes, int]:
+    """Return the canonical form of `board` packed and the transform to it."""
+    canonical_board, transform = CompactBoard.from_board(
+        _with_turn_to_move(board)
+    ).canonical()
+    return canonical_board.to_bytes(), transform
+
+
+def canonical(board: Board) -> bytes:
+    """Return the packed form of the least of the symmetric forms of `board`."""
+    return _canonical(board)[0]
+
+
+def position_hash(board: Board) -> int:
+    """Return the 64-bit hash under which the position of `board` is indexed."""
+    digest = hashlib.blake2b(canonical(board), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def game_positions(moves: list[Position]) -> list[Board]:
+    """Return the board at every ply of a game, including the final one."""
+    boards = list(replay(moves))
+    final = boards[-1].copy() if boards else Board()
+    if moves:
+        final.place(final.turn_player_color, moves[-1])
+        final.swap_turn_players()
+    return boards + [final]
+
+
+class _Segment:
+    """A memory-mapped file of entries sorted by hash."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self._map) // _ENTRY.size
+
+    def _hash_at(self, i: int) -> int:
+        start = i * _ENTRY.size
+        return int.from_bytes(self._map[start : start + 8], "big")
+
+    def find(self, key: int) -> Iterator[tuple[int, int, int, int]]:
+        """Yield the entries with hash `key`."""
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._hash_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        for i in range(lo, self.size):
+            entry = _ENTRY.unpack_from(self._map, i * _ENTRY.size)
+            if entry[0] != key:
+                break
+            yield entry
+
+    def entries(self) -> Iterator[tuple[int, int, int, int]]:
+        """Yield every entry in order."""
+        return _ENTRY.iter_unpack(self._map)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class PositionIndex:
+    """Index of the positions reached in a set of record files."""
+
+    def __init__(self, directory: Union[str, Path]):
+        """Open the index in `directory`, creating an empty one if necessary."""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.directory / MANIFEST_NAME
+        if manifest_path.exists():
+            with open(manifest_path) as f:
+                self._manifest = json.load(f)
+        else:
+            self._manifest = dict(archives=[], segments=[], next_segment=0)
+        self._segments = [
+            _Segment(self.directory / name) for name in self._manifest["segments"]
+        ]
+
+    @property
+    def paths(self) -> list[Path]:
+        """Record files in the index."""
+        return [Path(archive["path"]) for archive in self._manifest["archives"]]
+
+    def update(self, paths: Iterable[Union[str, Path]] = ()) -> int:
+        """
+        Index new record files and the games appended to indexed ones.
+
+        Games are indexed once their line ends in a newline, so a game still
+        being appended is left for a later update. Returns the number of
+        positions indexed.
+        """
+        archives = self._manifest["archives"]
+        known = {archive["path"] for archive in archives}
+        for path in paths:
+            path = str(Path(path).resolve())
+            if path not in known:
+                archives.append(dict(path=path, indexed=0))
+                known.add(path)
+
+        entries = []
+        for number, archive in enumerate(archives):
+            start = archive["indexed"]
+            end = complete_lines_end(archive["path"], start)
+            for offset, moves in iter_records(archive["path"], start, end):
+                for ply, board in enumerate(game_positions(moves)):
+                    entries.append((position_hash(board), number, offset, ply))
+            archive["indexed"] = end
+        if entries:
+            entries.sort()
+            self._add_segment(entries)
+        self._write_manifest()
+        _logger.info("Indexed %d positions", len(entries))
+        return len(entries)
+
+    def compact(self):
+        """Merge all segments into one."""
+        if len(self._segments) < 2:
+            return
+        old = self._segments
+        self._segments = []
+        self._manifest["segments"] = []
+        self._add_segment(merge(*(segment.entries() for segment in old)))
+        self._write_manifest()
+        for segment in old:
+            segment.close()
+            segment.path.unlink()
+
+    def lookup(self, board: Board) -> list[Occurrence]:
+        """
+        Return every indexed game that reached the position of `board`.
+
+        Each occurrence has the record file and offset of the game, the ply at
+        which it reached the position, the move played next, transformed to
+        the orientation of `board`, or None if the game ended there, and the
+        final disc difference for black.
+        """
+        key = position_hash(board)
+        target, to_target = _canonical(board)
+        from_target = bb.INVERSE_TRANSFORMS[to_target]
+        paths = self.paths
+        games = {}
+        occurrences = []
+        for segment in self._segments:
+            for _, number, offset, ply in segment.find(key):
+                if (number, offset) not in games:
+                    moves = read_record_at(paths[number], offset)
+                    games[number, offset] = (moves, game_positions(moves))
+                moves, boards = games[number, offset]
+                found, to_found = _canonical(boards[ply])
+                if found != target:
+                    continue  # Hash collision
+                next_move = None
+                if ply < len(moves):
+                    # Through the canonical form to the orientation of board
+                    next_move = bb.transform_position(
+                        bb.transform_position(moves[ply], to_found), from_target
+                    )
+                final = boards[-1]
+                score = final.black.bit_count() - final.white.bit_count()
+                occurrences.append(
+                    Occurrence(paths[number], offset, ply, next_move, score)
+                )
+        return sorted(occurrences, key=lambda o: (str(o.path), o.offset, o.ply))
+
+    def _add_segment(self, entries: Iterable[tuple[int, int, int, int]]):
+        name = f"segment-{self._manifest['next_segment']:06d}.idx"
+        self._manifest["next_segment"] += 1
+        path = self.directory / name
+        tmp_path = path.with_name(name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            for entry in entries:
+                f.write(_ENTRY.pack(*entry))
+        os.replace(tmp_path, path)
+        self._segments.append(_Segment(path))
+        self._manifest["segments"].append(name)
+
+    def _write_manifest(self):
+        path = self.directory / MANIFEST_NAME
+        tmp_path = path.with_name(MANIFEST_NAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._manifest, f, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, path)
+
+    def close(self):
+        """Unmap the segments."""
+        for segment in self._segments:
+            segment.close()
+        self._segments = []
+
+    def __len__(self):
+        return sum(segment.size for segment in self._segments)
+
+    def __enter__(self) -> "PositionIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv: Optional[list[str]] = None):
+    """Entry point of the position index tool."""
+    parser = ArgumentParser(description="Index the positions of game records")
+    parser.add_argument("index", type=Path, help="Index directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Index new games of record files")
+    add.add_argument("records", nargs="*", type=Path, help="Game record files")
+    add.add_argument(
+        "--compact", action="store_true", help="Merge the segments afterwards"
+    )
+    lookup = commands.add_parser("lookup", help="Find the games reaching a position")
+    lookup.add_argument("transcript", help="Moves leading to the position")
+    args = parser.parse_args(argv)
+
+    with PositionIndex(args.index) as index:
+        if args.command == "add":
+            index.update(args.records)
+            if args.compact:
+                index.compact()
+            print(f"{len(index)} positions in {len(index.paths)} record files")
+        else:
+            board = position_after(parse_moves(args.transcript))
+            occurrences = index.lookup(board)
+            for o in occurrences:
+                move = format_move(o.next_move) if o.next_move else "end"
+                print(f"{o.path}:{o.offset} ply {o.ply} next {move} score {o.score:+d}")
+            print(f"{len(occurrences)} games")
+
+
+if __name__ == "__main__":
+    logging.basicConfig()
+    _logger.setLevel(logging.INFO)
+    main()
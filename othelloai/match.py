@@ -0,0 +1,377 @@
+"""
+Engine-vs-engine matches with a sequential probability ratio test.
+
+Two engine configurations play each other on pairs of games from the same
+opening with colors swapped. Pairs are played in parallel worker processes
+and after each pair a generalized SPRT on the pair scores decides whether
+engine A is stronger than engine B by `elo1` (H1) or by no more than `elo0`
+(H0). The match stops as soon as either hypothesis is accepted.
+
+Engines are written as ``NAME[:OPTION=VALUE,...]`` where NAME is an AI
+option, e.g. ``Marty:depth=3,lmr=true``.
+
+Usage: python -m othelloai.match ENGINE_A ENGINE_B -o match.jsonl
+"""
+
+import json
+import logging
+import multiprocessing
+from argparse import ArgumentParser
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import cycle, islice
+from math import log, log10, sqrt
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .ai import AIOption, ai_options
+from .bitboard import Position
+from .board import Board
+from .clock import TimeControl
+from .color import Color
+from .game import Game
+from .player import Player
+from .record import format_moves, parse_moves, position_after, read_records
+from .telemetry import Metrics, MetricsExporter
+
+_logger = logging.getLogger(__name__)
+
+# Keeps the test from stalling while every pair has had the same result
+_MIN_VARIANCE = 0.01
+
+
+def parse_engine(spec: str) -> tuple[AIOption, dict]:
+    """Return the AI option and player options written in `spec`."""
+    name, _, options_spec = spec.partition(":")
+    options = {}
+    for option in filter(None, options_spec.split(",")):
+        key, sep, value = option.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid engine option {option!r} in {spec!r}")
+        options[key.strip()] = _parse_value(value.strip())
+    return AIOption[name.strip()], options
+
+
+def _parse_value(value: str):
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    for type_ in (int, float):
+        try:
+            return type_(value)
+        except ValueError:
+            pass
+    return value
+
+
+def make_player(spec: str, color: Color) -> Player:
+    """Return a player of `color` configured by the engine `spec`."""
+    ai, options = parse_engine(spec)
+    return ai_options[ai](color, **options)
+
+
+def opening_transcripts(plies: int) -> list[str]:
+    """Return every opening of `plies` moves from the initial position."""
+    openings = [("", Board())]
+    for _ in range(plies):
+        extended = []
+        for transcript, board in openings:
+            for move in board.valid_moves():
+                child = board.copy()
+                child.place(child.turn_player_color, move)
+                child.swap_turn_players()
+                extended.append((transcript + format_moves([move]), child))
+        openings = extended
+    return [transcript for transcript, _ in openings]
+
+
+def play_game(
+    black_spec: str,
+    white_spec: str,
+    opening: list[Position],
+    time_control: Optional[TimeControl] = None,
+    metrics: Optional[Metrics] = None,
+) -> tuple[Board, Optional[Color]]:
+    """
+    Play a game between two engines from an opening.
+
+    Returns the final board and the winner, or None if the game is drawn.
+    Telemetry of the game is recorded into `metrics` if given.
+    """
+    black = make_player(black_spec, Color.black)
+    white = make_player(white_spec, Color.white)
+    game = Game(black, white, position_after(opening), time_control, metrics)
+    game.loop()
+    return game.board, game.winner
+
+
+def play_pair(
+    engine_a: str,
+    engine_b: str,
+    opening: str,
+    time_control: Optional[TimeControl] = None,
+    metrics: Optional[Metrics] = None,
+) -> dict:
+    """Play both colors of an opening and return the results for engine A."""
+    moves = parse_moves(opening)
+    games = []
+    for color_a in Color:
+        black, white = (
+            (engine_a, engine_b) if color_a is Color.black else (engine_b, engine_a)
+        )
+        board, winner = play_game(black, white, moves, time_control, metrics)
+        games.append(
+            dict(
+                color_a=color_a.name,
+                score_a=0.5 if winner is None else float(winner is color_a),
+                black_discs=board.black.bit_count(),
+                white_discs=board.white.bit_count(),
+            )
+        )
+    return dict(opening=opening, games=games)
+
+
+def _play_pair(args: tuple) -> tuple[dict, Optional[Metrics]]:
+    *args, telemetry = args
+    metrics = Metrics() if telemetry else None
+    return play_pair(*args, metrics=metrics), metrics
+
+
+def expected_score(elo: float) -> float:
+    """Return the expected score of a player `elo` points stronger."""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+class SPRT:
+    """
+    Generalized sequential probability ratio test on paired game results.
+
+    Each pair of games is scored 0, 1/4, 1/2, 3/4 or 1 for engine A and the
+    log-likelihood ratio uses the normal approximation of the pair scores
+    (pentanomial model), which accounts for the correlation within a pair.
+    """
+
+    def __init__(
+        self,
+        elo0: float = 0.0,
+        elo1: float = 10.0,
+        alpha: float = 0.05,
+        beta: float = 0.05,
+    ):
+        self.score0 = expected_score(elo0)
+        self.score1 = expected_score(elo1)
+        self.lower_bound = log(beta / (1 - alpha))
+        self.upper_bound = log((1 - beta) / alpha)
+        self.pairs = 0
+        self._total = 0.0
+        self._total_squares = 0.0
+
+    def add_pair(self, score: float):
+        """Add the score of engine A over a pair of games, from 0 to 2."""
+        score /= 2
+        self.pairs += 1
+        self._total += score
+        self._total_squares += score * score
+
+    @property
+    def mean(self) -> float:
+        """Mean pair score of engine A between 0 and 1."""
+        return self._total / self.pairs if self.pairs else 0.5
+
+    @property
+    def variance(self) -> float:
+        """Variance of the pair scores of engine A."""
+        if not self.pairs:
+            return 0.0
+        return self._total_squares / self.pairs - self.mean**2
+
+    @property
+    def llr(self) -> float:
+        """Log-likelihood ratio of H1 to H0."""
+        if not self.pairs:
+            return 0.0
+        return (
+            self.pairs
+            * (self.score1 - self.score0)
+            * (2 * self.mean - self.score0 - self.score1)
+            / (2 * max(self.variance, _MIN_VARIANCE))
+        )
+
+    def status(self) -> Optional[str]:
+        """Return "H0" or "H1" once a hypothesis is accepted, otherwise None."""
+        llr = self.llr
+        if llr >= self.upper_bound:
+            return "H1"
+        if llr <= self.lower_bound:
+            return "H0"
+        return None
+
+    def elo(self) -> tuple[float, float]:
+        """Return the Elo difference estimate of A over B and its 95% margin."""
+        error = 1.96 * sqrt(self.variance / self.pairs) if self.pairs else 0.5
+        low = _elo(self.mean - error)
+        high = _elo(self.mean + error)
+        return _elo(self.mean), (high - low) / 2
+
+
+def _elo(score: float) -> float:
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * log10(1 / score - 1)
+
+
+def run_match(
+    engine_a: str,
+    engine_b: str,
+    openings: list[str],
+    output: Path,
+    sprt: SPRT,
+    workers: Optional[int] = None,
+    max_pairs: Optional[int] = None,
+    time_control: Optional[TimeControl] = None,
+    metrics: Optional[Metrics] = None,
+) -> Optional[str]:
+    """
+    Play pairs until the SPRT accepts a hypothesis or `max_pairs` are played.
+
+    Each finished pair is appended to `output` as a line of JSON along with the
+    running test statistics. Telemetry of the games played by the workers is
+    merged into `metrics` if given. Returns the accepted hypothesis or None.
+    """
+    for spec in (engine_a, engine_b):
+        parse_engine(spec)  # Fail before starting workers
+    max_pairs = max_pairs if max_pairs is not None else len(openings)
+    telemetry = metrics is not None
+    tasks = (
+        (engine_a, engine_b, opening, time_control, telemetry)
+        for opening in cycle(openings)
+    )
+    tasks = islice(tasks, max_pairs)
+    workers = workers if workers is not None else multiprocessing.cpu_count()
+    status = None
+    # Workers must not be daemonic, since parallel engines start processes of
+    # their own. Only one pair per worker is queued at a time, so once a
+    # hypothesis is accepted the match ends with the pairs already running
+    executor = ProcessPoolExecutor(
+        workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    with executor, open(output, "a") as out:
+        running = {executor.submit(_play_pair, task) for task in islice(tasks, workers)}
+        while running and status is None:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                pair, pair_metrics = future.result()
+                if pair_metrics is not None:
+                    metrics.merge(pair_metrics)
+                sprt.add_pair(sum(game["score_a"] for game in pair["games"]))
+                status = sprt.status()
+                elo, margin = sprt.elo()
+                pair.update(
+                    pairs=sprt.pairs,
+                    llr=sprt.llr,
+                    elo=elo,
+                    elo_margin=margin,
+                    status=status,
+                )
+                out.write(json.dumps(pair) + "\n")
+                out.flush()
+                _logger.info(
+                    "%d pairs: LLR %.2f [%.2f, %.2f], Elo %.1f +/- %.1f",
+                    sprt.pairs,
+                    sprt.llr,
+                    sprt.lower_bound,
+                    sprt.upper_bound,
+                    elo,
+                    margin,
+                )
+                if status is not None:
+                    break
+            if status is None:
+                for task in islice(tasks, len(done)):
+                    running.add(executor.submit(_play_pair, task))
+    return status
+
+
+def read_openings(path: Path) -> Iterator[str]:
+    """Yield the transcripts of the openings in a record file."""
+    for moves in read_records(path):
+        yield format_moves(moves)
+
+
+def main(argv: Optional[list[str]] = None):
+    """Entry point of the match runner."""
+    parser = ArgumentParser(description="Play an SPRT match between two engines")
+    parser.add_argument("engine_a", help="Engine under test, e.g. Marty:depth=3")
+    parser.add_argument("engine_b", help="Reference engine")
+    parser.add_argument(
+        "-o", "--output", type=Path, required=True, help="JSON lines result file"
+    )
+    parser.add_argument("--openings", type=Path, help="Record file of openings")
+    parser.add_argument(
+        "--opening-plies",
+        type=int,
+        default=4,
+        help="Length of the generated openings if no opening file is given",
+    )
+    parser.add_argument(
+        "--time-control",
+        type=TimeControl.parse,
+        help="Time control, e.g. 60 for sudden death, 60+1 or /2 per move",
+    )
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=10.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("-j", "--workers", type=int, help="Worker processes")
+    parser.add_argument("--max-pairs", type=int, help="Stop after this many pairs")
+    parser.add_argument(
+        "--telemetry",
+        type=Path,
+        help="Export game metrics to this file, in the Prometheus text format if "
+        "it ends in .prom and as JSON lines otherwise",
+    )
+    parser.add_argument(
+        "--telemetry-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between metric exports",
+    )
+    args = parser.parse_args(argv)
+
+    openings = (
+        list(read_openings(args.openings))
+        if args.openings is not None
+        else opening_transcripts(args.opening_plies)
+    )
+    sprt = SPRT(args.elo0, args.elo1, args.alpha, args.beta)
+    metrics = Metrics() if args.telemetry is not None else None
+    exporter = (
+        MetricsExporter(metrics, args.telemetry, args.telemetry_interval)
+        if metrics is not None
+        else None
+    )
+    if exporter is not None:
+        exporter.start()
+    try:
+        status = run_match(
+            args.engine_a,
+            args.engine_b,
+            openings,
+            args.output,
+            sprt,
+            args.workers,
+            args.max_pairs,
+            args.time_control,
+            metrics,
+        )
+    finally:
+        if exporter is not None:
+            exporter.stop()
+    elo, margin = sprt.elo()
+    print(
+        f"{status or 'Inconclusive'} after {sprt.pairs} pairs:"
+        f" LLR {sprt.llr:.2f}, Elo {elo:.1f} +/- {margin:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig()
+    _logger.setLevel(logging.INFO)
+    main()
@@ -6,6 +6,7 @@ from typing import Optional
 
 from .bitboard import Position
 from .board import Board
+from .clock import Clock
 from .color import Color
 from .exception import IllegalMoveError, PassMove
 
@@ -16,25 +17,41 @@ class Player(ABC):
     def __init__(self, color: Color, **kwargs):
         """Construct a player with a color."""
         self._color = color
+        self._clock: Optional[Clock] = None
 
     @property
     def color(self) -> Color:
         """Player's color."""
         return self._color
 
-    def get_move(self, board: Board, interrupt: threading.Event) -> Position:
+    @property
+    def clock(self) -> Optional[Clock]:
+        """Player's running clock while it makes a move under a time control."""
+        return self._clock
+
+    def get_move(
+        self,
+        board: Board,
+        interrupt: threading.Event,
+        clock: Optional[Clock] = None,
+    ) -> Position:
         """
         Request a move from this player.
 
         The returned position is checked for validity against the board
         and this player's turn is automatically passed if there are no
-        valid moves.
+        valid moves. clock is this player's running clock if the game is
+        played under a time control, and is available to `_get_move` as the
+        `clock` property.
         """
-        valid_moves = board.valid_moves()
-        if not valid_moves:
+        if board.must_pass():
             raise PassMove
-        pos = self._get_move(board, interrupt)
-        if pos not in valid_moves:
+        self._clock = clock
+        try:
+            pos = self._get_move(board, interrupt)
+        finally:
+            self._clock = None
+        if pos not in board.valid_moves():
             raise IllegalMoveError
         return pos
 
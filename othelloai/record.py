@@ -0,0 +1,131 @@
+"""Game records.
+
+A game record is a transcript of moves in standard othello notation, e.g.
+``f5d6c3d3c4``. Columns are lettered a-h from left to right and rows are
+numbered 1-8 from top to bottom. Passes are implicit: a move is made by
+whichever player has a valid move when the other does not.
+
+Record files contain one game per line. Blank lines and lines beginning with
+``#`` are ignored.
+"""
+
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from .bitboard import Position
+from .board import Board
+from .exception import IllegalMoveError
+
+_COLUMNS = "abcdefgh"
+
+
+def parse_move(move: str) -> Position:
+    """Return the position of a move written in standard notation."""
+    move = move.strip().lower()
+    if len(move) != 2 or move[0] not in _COLUMNS or move[1] not in "12345678":
+        raise ValueError(f"Invalid move: {move!r}")
+    return Position(int(move[1]) - 1, _COLUMNS.index(move[0]))
+
+
+def format_move(pos: Position) -> str:
+    """Return `pos` written in standard notation."""
+    return f"{_COLUMNS[pos.col]}{pos.row + 1}"
+
+
+def parse_moves(transcript: str) -> list[Position]:
+    """Return the list of moves in a transcript."""
+    transcript = "".join(transcript.split())
+    if len(transcript) % 2 != 0:
+        raise ValueError(f"Invalid transcript: {transcript!r}")
+    return [parse_move(transcript[i : i + 2]) for i in range(0, len(transcript), 2)]
+
+
+def format_moves(moves: list[Position]) -> str:
+    """Return `moves` written as a transcript."""
+    return "".join(format_move(move) for move in moves)
+
+
+def read_records(path: Union[str, Path]) -> Iterator[list[Position]]:
+    """Yield the moves of each game in the record file at `path`."""
+    for _, moves in iter_records(path):
+        yield moves
+
+
+def iter_records(
+    path: Union[str, Path], start: int = 0, end: Optional[int] = None
+) -> Iterator[tuple[int, list[Position]]]:
+    """
+    Yield the byte offset and moves of each game in the record file at `path`.
+
+    Reading begins at byte offset `start`, which must be the start of a line,
+    and stops before the line at or after byte offset `end` if given.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            if end is not None and offset >= end:
+                break
+            text = line.decode().strip()
+            if text and not text.startswith("#"):
+                yield offset, parse_moves(text)
+            offset += len(line)
+
+
+def complete_lines_end(path: Union[str, Path], start: int = 0) -> int:
+    """
+    Return the byte offset just past the last newline of the file at `path`.
+
+    Only the part of the file after byte offset `start`, which must be the
+    start of a line, is read. A last line without a newline, which may still
+    be being written, is left out.
+    """
+    end = start
+    with open(path, "rb") as f:
+        f.seek(start)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            end += len(line)
+    return end
+
+
+def read_record_at(path: Union[str, Path], offset: int) -> list[Position]:
+    """Return the moves of the game at byte offset `offset` of a record file."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return parse_moves(f.readline().decode())
+
+
+def replay(moves: list[Position], board: Optional[Board] = None) -> Iterator[Board]:
+    """
+    Yield the board before each move of a game.
+
+    The turn player of each yielded board is the player making the next move.
+    Raises an IllegalMoveError if the record contains an illegal move.
+    """
+    board = board.copy() if board is not None else Board()
+    for move in moves:
+        if move not in board.valid_moves():
+            board.swap_turn_players()
+            if move not in board.valid_moves():
+                raise IllegalMoveError
+        yield board.copy()
+        board.place(board.turn_player_color, move)
+        board.swap_turn_players()
+
+
+def position_after(moves: list[Position], board: Optional[Board] = None) -> Board:
+    """
+    Return the board after the moves of a game.
+
+    The turn player of the returned board is the player to move next, unless
+    that player has to pass.
+    """
+    board = board.copy() if board is not None else Board()
+    for board in replay(moves, board):
+        pass
+    if moves:
+        board.place(board.turn_player_color, moves[-1])
+        board.swap_turn_players()
+    return board
@@ -0,0 +1,326 @@
+"""
+Game telemetry.
+
+Games record how long players take to move, how long observers take to
+handle events, the time the game loop spends on its own work and how many
+moves, passes and illegal moves were made. Timings are aggregated into
+histograms and counts into counters, each optionally labelled, e.g. by
+player color. `MetricsExporter` periodically writes them to a local file as
+lines of JSON or in the Prometheus text format. The moves per second they
+report include the time of games in progress, so the rate is meaningful
+during the first game.
+
+Metrics:
+    move_seconds{player}          Time spent in a player's get_move
+    notify_seconds{event}         Time observers spent handling an event
+    loop_seconds                  Time of a loop iteration outside of both
+    game_seconds                  Duration of a game
+    moves_total{player}           Moves made
+    passes_total{player}          Passed turns
+    illegal_moves_total{player}   Illegal moves that had to be retried
+    games_total                   Games finished
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from math import inf
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+_logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the histogram buckets
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+    60.0,
+    inf,
+)
+PROMETHEUS_PREFIX = "othello_"
+
+
+class Histogram:
+    """Counts of observations falling into buckets with fixed upper bounds."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        assert self.buckets[-1] == inf, "The last bucket must be unbounded"
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Add an observation."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: "Histogram"):
+        """Add the observations of `other`, which must have the same buckets."""
+        assert self.buckets == other.buckets, "Buckets differ"
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket holding the `q` quantile."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return 0.0
+
+    def to_dict(self) -> dict:
+        """Return the histogram as a JSON serializable dict."""
+        return dict(
+            count=self.count,
+            sum=self.sum,
+            p50=self.quantile(0.5),
+            p99=self.quantile(0.99),
+            buckets={_format_bound(b): c for b, c in zip(self.buckets, self.counts)},
+        )
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == inf else f"{bound:g}"
+
+
+def _labels_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: tuple, extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    """Thread-safe collection of labelled histograms and counters."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._counters: dict[tuple[str, tuple], int] = {}
+        # Start times of the games in progress by their keys
+        self._live_games: dict[int, float] = {}
+        self._next_game = 0
+
+    def start_game(self) -> int:
+        """Start timing a game and return the key that `finish_game` takes."""
+        with self._lock:
+            key = self._next_game
+            self._next_game += 1
+            self._live_games[key] = time.perf_counter()
+        return key
+
+    def finish_game(self, key: int):
+        """Record the duration of the game started under `key`."""
+        with self._lock:
+            started_at = self._live_games.pop(key)
+        self.observe("game_seconds", time.perf_counter() - started_at)
+        self.increment("games_total")
+
+    def observe(self, name: str, value: float, **labels):
+        """Add an observation to histogram `name` with `labels`."""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: int = 1, **labels):
+        """Add `amount` to counter `name` with `labels`."""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def merge(self, other: "Metrics"):
+        """Add the metrics of `other`, e.g. those of a game in another process."""
+        with other._lock:
+            histograms = list(other._histograms.items())
+            counters = list(other._counters.items())
+        with self._lock:
+            for key, histogram in histograms:
+                mine = self._histograms.get(key)
+                if mine is None:
+                    mine = self._histograms[key] = Histogram(self.buckets)
+                mine.merge(histogram)
+            for key, count in counters:
+                self._counters[key] = self._counters.get(key, 0) + count
+
+    def counter(self, name: str, **labels) -> int:
+        """Return the value of counter `name` with `labels`."""
+        with self._lock:
+            return self._counters.get((name, _labels_key(labels)), 0)
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        """Return histogram `name` with `labels` or None if it has no data."""
+        with self._lock:
+            return self._histograms.get((name, _labels_key(labels)))
+
+    def moves_per_second(self) -> float:
+        """Return the moves made per second of game time, including live games."""
+        now = time.perf_counter()
+        with self._lock:
+            moves = sum(
+                count
+                for (name, _), count in self._counters.items()
+                if name == "moves_total"
+            )
+            game_seconds = sum(
+                histogram.sum
+                for (name, _), histogram in self._histograms.items()
+                if name == "game_seconds"
+            )
+            game_seconds += sum(
+                now - started_at for started_at in self._live_games.values()
+            )
+        return moves / game_seconds if game_seconds else 0.0
+
+    def snapshot(self) -> dict:
+        """Return the current metrics as a JSON serializable dict."""
+        moves_per_second = self.moves_per_second()
+        with self._lock:
+            histograms = [
+                dict(name=name, labels=dict(labels), **histogram.to_dict())
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+            counters = [
+                dict(name=name, labels=dict(labels), value=count)
+                for (name, labels), count in sorted(self._counters.items())
+            ]
+        return dict(
+            time=time.time(),
+            moves_per_second=moves_per_second,
+            histograms=histograms,
+            counters=counters,
+        )
+
+    def to_prometheus(self) -> str:
+        """Return the current metrics in the Prometheus text format."""
+        lines = []
+        moves_per_second = self.moves_per_second()
+        with self._lock:
+            for name in sorted({name for name, _ in self._histograms}):
+                lines.append(f"# TYPE {PROMETHEUS_PREFIX}{name} histogram")
+                for (other, labels), histogram in sorted(self._histograms.items()):
+                    if other != name:
+                        continue
+                    full_name = PROMETHEUS_PREFIX + name
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        le = f'le="{_format_bound(bound)}"'
+                        lines.append(
+                            f"{full_name}_bucket{_format_labels(labels, le)}"
+                            f" {cumulative}"
+                        )
+                    lines.append(
+                        f"{full_name}_sum{_format_labels(labels)} {histogram.sum}"
+                    )
+                    lines.append(
+                        f"{full_name}_count{_format_labels(labels)} {histogram.count}"
+                    )
+            for name in sorted({name for name, _ in self._counters}):
+                lines.append(f"# TYPE {PROMETHEUS_PREFIX}{name} counter")
+                for (other, labels), count in sorted(self._counters.items()):
+                    if other == name:
+                        lines.append(
+                            f"{PROMETHEUS_PREFIX}{name}{_format_labels(labels)} {count}"
+                        )
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}moves_per_second gauge")
+        lines.append(f"{PROMETHEUS_PREFIX}moves_per_second {moves_per_second}")
+        return "\n".join(lines) + "\n"
+
+    def __getstate__(self):
+        with self._lock:
+            state = self.__dict__.copy()
+        del state["_lock"]
+        # Start times are only meaningful in the process that took them
+        state["_live_games"] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class MetricsExporter:
+    """
+    Periodically writes metrics to a local file.
+
+    Files ending in ``.prom`` are rewritten in the Prometheus text format on
+    each export, so that a node exporter's textfile collector can pick them
+    up. Any other file has a line of JSON appended with a snapshot of the
+    metrics.
+    """
+
+    def __init__(
+        self, metrics: Metrics, path: Union[str, Path], interval: float = 10.0
+    ):
+        self.metrics = metrics
+        self.path = Path(path)
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="MetricsExporter", daemon=True
+        )
+
+    @property
+    def is_prometheus(self) -> bool:
+        """True if metrics are written in the Prometheus text format."""
+        return self.path.suffix == ".prom"
+
+    def export(self):
+        """Write the current metrics."""
+        if self.is_prometheus:
+            # Write then rename so readers never see a partial file
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            tmp_path.write_text(self.metrics.to_prometheus())
+            os.replace(tmp_path, self.path)
+        else:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(self.metrics.snapshot()) + "\n")
+
+    def start(self):
+        """Start exporting every `interval` seconds."""
+        self._thread.start()
+
+    def stop(self):
+        """Stop exporting after a final export."""
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.export()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.export()
+            except OSError:
+                _logger.exception("Failed to export metrics to %s", self.path)
+
+    def __enter__(self) -> "MetricsExporter":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
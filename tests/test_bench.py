@@ -0,0 +1,53 @@
+from othelloai.bench import (
+    compare,
+    format_board,
+    parse_board,
+    read_positions,
+    run_suite,
+)
+from othelloai.board import Board
+
+
+def test_board_text_round_trip():
+    board = Board()
+    text = format_board(board)
+    assert text == "-" * 27 + "OX------XO" + "-" * 27 + " X"
+    assert parse_board(*text.split()) == board
+
+
+def test_quick_positions_solved():
+    positions = [
+        position
+        for position in read_positions()
+        if position.name in ("e01", "e02", "e03", "m01")
+    ]
+    results = run_suite("Marty", positions)
+    assert results["summary"]["correct"] == len(positions) == 4
+    assert all(result["nps"] > 0 for result in results["positions"])
+
+
+def test_selective_search_solves_endgames_exactly():
+    positions = [
+        position
+        for position in read_positions()
+        if position.name in ("e02", "e03", "e04")
+    ]
+    for engine in ("Marty:probcut=true", "Marty:lmr=true"):
+        results = run_suite(engine, positions)
+        assert results["summary"]["correct"] == len(positions)
+
+
+def test_node_budget_limits_depth():
+    (position,) = [p for p in read_positions() if p.name == "m01"]
+    results = run_suite("Marty", [position], depth=20, max_nodes=500)
+    (result,) = results["positions"]
+    assert 0 < result["depth"] < 20
+    assert results["summary"]["depth"] == result["depth"]
+
+
+def test_compare_reports_regressions():
+    baseline = dict(positions=[dict(name="p", correct=True, nodes=100, seconds=1.0)])
+    same = dict(positions=[dict(name="p", correct=True, nodes=104, seconds=1.2)])
+    assert compare(same, baseline) == []
+    worse = dict(positions=[dict(name="p", correct=False, nodes=200, seconds=2.0)])
+    assert len(compare(worse, baseline)) == 3
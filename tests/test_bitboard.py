@@ -97,3 +97,28 @@ def test_to_list():
         bb.Position(4, 7),
         bb.Position(6, 7),
     ]
+
+
+def test_transforms_match_position_maps():
+    bits = bb.pos_mask(0, 1) | bb.pos_mask(2, 5) | bb.pos_mask(7, 3)
+    for i, transform in enumerate(bb.TRANSFORMS):
+        expected = 0
+        for pos in bb.to_list(bits):
+            expected |= bb.pos_mask(*bb.transform_position(pos, i))
+        assert transform(bits) == expected
+        inverse = bb.TRANSFORMS[bb.INVERSE_TRANSFORMS[i]]
+        assert inverse(transform(bits)) == bits
+
+
+def test_canonical_is_shared_by_symmetric_positions():
+    white, black = 0x0000001008000000, 0x0000081810000000
+    forms = {
+        bb.canonical(transform(white), transform(black))[:2]
+        for transform in bb.TRANSFORMS
+    }
+    assert len(forms) == 1
+    c_white, c_black, transform = bb.canonical(white, black)
+    assert (bb.TRANSFORMS[transform](white), bb.TRANSFORMS[transform](black)) == (
+        c_white,
+        c_black,
+    )
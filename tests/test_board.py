@@ -1,7 +1,8 @@
 import pytest
 
 from othelloai import bitboard as bb
-from othelloai.board import Board
+from othelloai.ai.minmax import MinmaxAIPlayer
+from othelloai.board import PACKED_SIZE, Board, CompactBoard
 from othelloai.player import Color
 from othelloai.exception import IllegalMoveError
 
@@ -18,3 +19,107 @@ def test_place_and_capture():
     pos = bb.Position(2, 4)
     board.place(Color.black, pos)
     assert board.white == 0x0000100010200000 and board.black == 0x0000081828000000
+
+
+def test_compact_board_plays_like_board():
+    board = Board()
+    compact = CompactBoard()
+    for _ in range(20):
+        moves = board.valid_moves()
+        assert compact.valid_moves() == moves
+        if moves:
+            board.place(board.turn_player_color, moves[-1])
+            compact.place(compact.turn_player_color, moves[-1])
+        board.swap_turn_players()
+        compact.swap_turn_players()
+        assert CompactBoard.from_board(board) == compact
+        assert compact != board and board != compact
+    assert compact.to_board() == board
+    assert CompactBoard.from_board(board) == compact
+
+
+def test_compact_board_encodings_round_trip():
+    board = CompactBoard()
+    board.place(Color.black, bb.Position(2, 3))
+    board.swap_turn_players()
+    data = board.to_bytes()
+    assert len(data) == PACKED_SIZE
+    assert CompactBoard.from_bytes(data) == board
+    assert CompactBoard.from_text(board.to_text()) == board
+    rows = ["--------", "--------", "---X----", "---XX---", "---XO---"]
+    assert board.to_text() == "".join(rows) + "-" * 24 + " O"
+    with pytest.raises(ValueError):
+        CompactBoard.from_bytes(data[:-1])
+
+
+def test_compact_board_hash_and_copy():
+    board = CompactBoard()
+    copy = board.copy()
+    assert hash(copy) == hash(board) and copy == board
+    copy.swap_turn_players()
+    assert copy != board
+    assert len({board, copy, CompactBoard()}) == 2
+    assert not hasattr(board, "__dict__")
+
+
+def test_derived_state_follows_moves():
+    board = Board()
+    assert bb.to_list(board.move_mask(Color.black)) == board.valid_moves()
+    assert board.empty_cells().bit_count() == 60
+    moves = board.valid_moves()
+    moves.clear()
+    assert len(board.valid_moves()) == 4
+    flips = board.place(Color.black, bb.Position(2, 3))
+    assert board.empty_cells().bit_count() == 59
+    board.swap_turn_players()
+    assert board.valid_moves() == [
+        bb.Position(2, 2),
+        bb.Position(2, 4),
+        bb.Position(4, 2),
+    ]
+    board.undo(Color.black, bb.Position(2, 3), flips)
+    board.swap_turn_players()
+    assert board.move_mask() == Board().move_mask()
+
+
+def test_pass_and_game_over_status():
+    assert not Board().must_pass() and not Board().is_game_over()
+    # Black's only disc is on a1 and white's on b1 and c1
+    board = Board(bb.pos_mask(0, 1) | bb.pos_mask(0, 2), bb.pos_mask(0, 0))
+    assert not board.must_pass()
+    board.swap_turn_players()
+    assert board.must_pass() and not board.is_game_over()
+    board = Board(0, bb.pos_mask(0, 0))
+    assert board.must_pass() and board.is_game_over()
+
+
+def test_setting_pieces_updates_derived_state():
+    board = Board()
+    board.track_features()
+    copy = board.copy()
+    assert len(board.valid_moves()) == len(copy.valid_moves()) == 4
+    board.white = bb.pos_mask(0, 1) | bb.pos_mask(0, 2)
+    board.black = bb.pos_mask(0, 0)
+    assert board.valid_moves() == [bb.Position(0, 3)]
+    assert board.empty_cells().bit_count() == 61
+    assert board.features.discs == {Color.black: 1, Color.white: 2}
+    assert len(copy.valid_moves()) == 4 and copy == Board()
+
+
+@pytest.mark.parametrize("board_type", [Board, CompactBoard])
+def test_board_types_share_an_interface(board_type):
+    board = board_type()
+    board.track_features()
+    assert board.move_mask(Color.white) == Board().move_mask(Color.white)
+    flips = board.place(Color.black, bb.Position(2, 3))
+    assert flips == bb.pos_mask(3, 3)
+    assert board.features.discs == {Color.black: 4, Color.white: 1}
+    board.undo(Color.black, bb.Position(2, 3), flips)
+    assert (board.white, board.black) == (Board().white, Board().black)
+    assert board.features.discs == {Color.black: 2, Color.white: 2}
+    assert not board.must_pass() and not board.is_game_over()
+    board.white = 0
+    assert board.must_pass() and board.is_game_over()
+
+    player = MinmaxAIPlayer(Color.black, 2)
+    assert player.analyze(board_type(), 2) == player.analyze(Board(), 2)
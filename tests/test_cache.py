@@ -0,0 +1,133 @@
+import gc
+import multiprocessing
+import sqlite3
+
+import pytest
+
+from othelloai import bitboard as bb
+from othelloai.ai.cache import AnalysisCache
+from othelloai.ai.minmax import MinmaxAIPlayer
+from othelloai.board import Board
+from othelloai.color import Color
+
+
+def test_store_and_get(tmp_path):
+    cache = AnalysisCache(tmp_path / "cache.db", batch_size=2)
+    board = Board()
+    assert cache.get(board) is None
+    cache.store(board, 3, 2, bb.Position(2, 3))
+    assert cache.get(board) == (3, 2, bb.Position(2, 3))
+    cache.close()
+
+    cache = AnalysisCache(tmp_path / "cache.db")
+    assert cache.get(board) == (3, 2, bb.Position(2, 3))
+    cache.close()
+
+
+def test_keeps_deepest_result(tmp_path):
+    cache = AnalysisCache(tmp_path / "cache.db", batch_size=1)
+    board = Board()
+    cache.store(board, 4, 1, bb.Position(2, 3))
+    cache.store(board, 2, 5, bb.Position(3, 2))
+    assert cache.get(board) == (4, 1, bb.Position(2, 3))
+    cache.store(board, 5, 0, None)
+    assert cache.get(board) == (5, 0, None)
+    cache.close()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = AnalysisCache(tmp_path / "cache.db", max_entries=2, batch_size=1)
+    boards = [Board(), Board(0, 1), Board(0, 2)]
+    cache.store(boards[0], 1, 0, None)
+    cache.store(boards[1], 1, 0, None)
+    cache.get(boards[0])
+    cache.store(boards[2], 1, 0, None)
+    assert len(cache) == 2
+    assert cache.get(boards[1]) is None
+    assert cache.get(boards[0]) is not None
+    cache.close()
+
+
+# Black pieces that no symmetry maps to themselves, so boards are all distinct
+_ASYMMETRIC = bb.pos_mask(0, 1) | bb.pos_mask(0, 2) | bb.pos_mask(1, 0)
+
+
+def _fill(path, offset):
+    cache = AnalysisCache(path, batch_size=10)
+    for i in range(100):
+        cache.store(Board(offset + i, _ASYMMETRIC), 1, i, None)
+    cache.close()
+
+
+def test_concurrent_writers(tmp_path):
+    path = tmp_path / "cache.db"
+    AnalysisCache(path).close()
+    processes = [
+        multiprocessing.Process(target=_fill, args=(path, offset))
+        for offset in (0, 1000, 2000)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    cache = AnalysisCache(path)
+    assert len(cache) == 300
+    cache.close()
+
+
+def test_symmetric_positions_share_results(tmp_path):
+    cache = AnalysisCache(tmp_path / "cache.db")
+    board = Board()
+    board.place(Color.black, bb.Position(2, 3))
+    board.swap_turn_players()
+    cache.store(board, 4, -1, bb.Position(2, 2))
+    mirrored = Board(
+        bb.mirror_horizontal(board.white),
+        bb.mirror_horizontal(board.black),
+        Color.white,
+    )
+    assert cache.get(mirrored) == (4, -1, bb.Position(2, 5))
+    assert len(cache) == 1
+    cache.close()
+
+
+def test_player_reuses_cached_search(tmp_path):
+    path = tmp_path / "cache.db"
+    board = Board()
+    first = MinmaxAIPlayer(Color.black, 3, cache_path=path)
+    expected = first._find_best_move(board, 3)
+    first._on_game_over(None, board)
+
+    second = MinmaxAIPlayer(Color.black, 3, cache_path=path)
+    assert second._find_best_move(board, 3) == expected
+    assert second.nodes == 1
+
+
+def test_search_options_do_not_share_results(tmp_path):
+    path = tmp_path / "cache.db"
+    board = Board()
+    first = MinmaxAIPlayer(Color.black, 3, cache_path=path)
+    first._find_best_move(board, 3)
+    first._on_game_over(None, board)
+
+    for options in (dict(lmr=True), dict(probcut=True), dict(max_nodes=10_000)):
+        other = MinmaxAIPlayer(Color.black, 3, cache_path=path, **options)
+        other._find_best_move(board, 3)
+        assert other.nodes > 1
+    unordered = MinmaxAIPlayer(Color.black, 3, cache_path=path, ordering=False)
+    unordered._find_best_move(board, 3)
+    assert unordered.nodes == 1
+
+
+def test_player_closes_cache(tmp_path):
+    player = MinmaxAIPlayer(Color.black, 3, cache_path=tmp_path / "cache.db")
+    player._find_best_move(Board(), 3)
+    connection = player._cache._connection
+    del player
+    gc.collect()
+    with pytest.raises(sqlite3.ProgrammingError):
+        connection.execute("SELECT 1")
+    cache = AnalysisCache(tmp_path / "cache.db")
+    assert len(cache) == 1
+    cache.close()
@@ -0,0 +1,140 @@
+import threading
+import time
+from math import inf
+
+import pytest
+
+from othelloai.ai import MinmaxAIPlayer, RandomAIPlayer
+from othelloai.bitboard import Position
+from othelloai.board import Board
+from othelloai.clock import Clock, TimeControl, allocate_time
+from othelloai.color import Color
+from othelloai.exception import PlayerInterrupted
+from othelloai.game import Game
+
+
+class StallingPlayer(RandomAIPlayer):
+    def _get_move(self, board, interrupt):
+        interrupt.wait()
+        raise PlayerInterrupted
+
+
+class IllegalMovesPlayer(RandomAIPlayer):
+    """Attempts `illegal` illegal moves, each after `delay` seconds."""
+
+    def __init__(self, color, illegal, delay=0.0):
+        super().__init__(color)
+        self.illegal = illegal
+        self.delay = delay
+
+    def _get_move(self, board, interrupt):
+        if self.illegal:
+            self.illegal -= 1
+            time.sleep(self.delay)
+            return Position(0, 0)
+        return super()._get_move(board, interrupt)
+
+
+def test_parse_time_control():
+    assert str(TimeControl.parse("300")) == "300"
+    assert str(TimeControl.parse("60+0.5")) == "60+0.5"
+    assert TimeControl.parse("/2").move_time == 2
+    with pytest.raises(ValueError):
+        TimeControl.parse("fast")
+
+
+def test_clock_increment():
+    clock = Clock(TimeControl(10, increment=2))
+    clock.start()
+    assert clock.time_left() <= 10
+    clock.stop()
+    assert 11.9 < clock.time_left() <= 12
+    assert not clock.flagged
+
+
+def test_clock_flag_fall():
+    clock = Clock(TimeControl(0.01, increment=5))
+    clock.start()
+    time.sleep(0.02)
+    clock.stop()
+    assert clock.flagged
+
+
+def test_fixed_move_time_resets():
+    clock = Clock(TimeControl(move_time=1))
+    for _ in range(3):
+        clock.start()
+        time.sleep(0.4)
+        clock.stop()
+    assert 0 < clock.time_left() < 0.6
+
+
+def test_allocation_favours_middlegame():
+    time_left = 60
+    allocated = {}
+    for empties in range(60, 0, -2):
+        allocated[empties] = allocate_time(Clock(TimeControl(time_left)), empties)
+        time_left -= allocated[empties]
+    assert time_left > 0
+    assert allocated[32] > 2 * allocated[56]
+    assert allocated[32] > 2 * allocated[10]
+    assert allocate_time(Clock(TimeControl()), 32) == inf
+
+
+def test_flag_fall_loses_game():
+    game = Game(
+        StallingPlayer(Color.black),
+        RandomAIPlayer(Color.white),
+        time_control=TimeControl(0.05),
+    )
+    game.loop()
+    assert game.winner is Color.white
+    assert game.clocks[Color.black].flagged
+
+
+def test_minmax_respects_time_allocation():
+    player = MinmaxAIPlayer(Color.black, 60)
+    board = Board()
+    clock = Clock(TimeControl(move_time=0.5))
+    clock.start()
+    move = player.get_move(board, threading.Event(), clock)
+    clock.stop()
+    assert move in board.valid_moves()
+    assert not clock.flagged
+
+
+def test_illegal_moves_do_not_add_increment():
+    game = Game(
+        IllegalMovesPlayer(Color.black, 3),
+        StallingPlayer(Color.white),
+        time_control=TimeControl(0.2, increment=1),
+    )
+    game.loop()
+    assert game.winner is Color.black
+    assert game.clocks[Color.black].time_left() <= 1.2
+
+
+def test_clock_runs_across_illegal_moves():
+    game = Game(
+        IllegalMovesPlayer(Color.black, 3, delay=0.1),
+        RandomAIPlayer(Color.white),
+        time_control=TimeControl(move_time=0.25),
+    )
+    game.loop()
+    assert game.winner is Color.white
+    assert game.clocks[Color.black].flagged
+
+
+@pytest.mark.parametrize("time_control", [TimeControl(), TimeControl(increment=1)])
+def test_unbounded_clock_game(monkeypatch, time_control):
+    errors = []
+    monkeypatch.setattr(threading, "excepthook", errors.append)
+    game = Game(
+        RandomAIPlayer(Color.black),
+        RandomAIPlayer(Color.white),
+        time_control=time_control,
+    )
+    game.loop()
+    assert errors == []
+    assert game.board.is_game_over()
+    assert not any(clock.flagged for clock in game.clocks.values())
@@ -0,0 +1,94 @@
+import json
+import multiprocessing
+import socket
+import threading
+
+from othelloai.board import Board
+from othelloai.distributed import (
+    Coordinator,
+    analysis_job,
+    match_jobs,
+    run_job,
+    run_worker,
+    selfplay_jobs,
+)
+from othelloai.record import parse_moves, position_after
+
+
+def test_run_jobs():
+    result = run_job(selfplay_jobs("Randy", ["f5d6"])[0])
+    moves = parse_moves(result["transcript"])
+    assert moves[:2] == parse_moves("f5d6")
+    final = position_after(moves)
+    assert result["black_discs"] == final.black.bit_count()
+    assert result["winner"] in ("black", "white", None)
+
+    result = run_job(analysis_job("Marty", Board(), 2))
+    assert result["move"] in ("d3", "c4", "f5", "e6") and result["nodes"] > 0
+
+
+def test_requeues_jobs_of_lost_workers(tmp_path):
+    output = tmp_path / "results.jsonl"
+    jobs = match_jobs("Randy", "Randy", ["f5", "d3", "c4", "e6"])
+    jobs += [analysis_job("Marty", Board(), 1) for _ in range(3)]
+    coordinator = Coordinator(
+        jobs, output, "127.0.0.1", 0, batch_size=2, heartbeat_timeout=2
+    )
+    host, port = coordinator.address
+    served = []
+    server = threading.Thread(target=lambda: served.append(coordinator.serve(60)))
+    server.start()
+
+    # A worker that takes a batch and dies without returning results
+    with socket.create_connection((host, port)) as lost:
+        f = lost.makefile("rwb")
+        f.write(b'{"type": "request"}\n')
+        f.flush()
+        assert json.loads(f.readline())["type"] == "batch"
+
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=run_worker, args=(host, port, f"worker-{i}"))
+        for i in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+    server.join()
+    for worker in workers:
+        worker.join(10)
+        assert worker.exitcode == 0
+    assert served == [True]
+
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(result["id"] for result in results) == list(range(len(jobs)))
+    assert {result["worker"] for result in results} <= {"worker-0", "worker-1"}
+    games = [result for result in results if result["job"]["kind"] == "game"]
+    assert all(result["result"]["transcript"] for result in games)
+
+
+def test_failed_jobs_are_recorded_not_requeued(tmp_path):
+    output = tmp_path / "results.jsonl"
+    jobs = [analysis_job("Nobody", Board(), 1), analysis_job("Marty", Board(), 1)]
+    coordinator = Coordinator(jobs, output, "127.0.0.1", 0, batch_size=1)
+    host, port = coordinator.address
+    served = []
+    server = threading.Thread(target=lambda: served.append(coordinator.serve(60)))
+    server.start()
+
+    # Malformed messages cost the sender its connection, not the coordinator
+    with socket.create_connection((host, port)) as bad:
+        f = bad.makefile("rwb")
+        f.write(b'{"kind": "request"}\n[1, 2]\n')
+        f.flush()
+        assert f.readline() == b""
+
+    assert run_worker(host, port, "worker") == 2
+    server.join()
+    assert served == [True]
+    assert coordinator.failed == 1
+    results = {
+        result["id"]: result
+        for result in map(json.loads, output.read_text().splitlines())
+    }
+    assert "KeyError" in results[0]["error"] and "result" not in results[0]
+    assert results[1]["result"]["move"] is not None
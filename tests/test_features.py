@@ -0,0 +1,51 @@
+import random
+
+from othelloai import bitboard as bb
+from othelloai.board import Board
+from othelloai.color import Color
+from othelloai.features import PATTERNS, FeatureState, square_of
+
+
+def test_initial_features():
+    features = FeatureState(Board().white, Board().black)
+    assert features.discs == {Color.black: 2, Color.white: 2}
+    assert features.parity == 0b1111
+    assert len(features.empties()) == 60
+    d4 = square_of(bb.Position(3, 3))
+    assert d4 not in features.empties()
+    row_4 = PATTERNS.index(tuple(range(24, 32)))
+    # d4 is white and e4 is black
+    assert features.pattern_indices[row_4] == 2 * 3**3 + 1 * 3**4
+
+
+def test_features_follow_moves_and_undo():
+    rng = random.Random(7)
+    board = Board()
+    board.track_features()
+    history = []
+    while True:
+        moves = board.valid_moves()
+        if not moves:
+            board.swap_turn_players()
+            moves = board.valid_moves()
+            if not moves:
+                break
+        color = board.turn_player_color
+        move = rng.choice(moves)
+        history.append((color, move, board.place(color, move)))
+        board.swap_turn_players()
+        assert board.features == FeatureState(board.white, board.black)
+
+    for color, move, flips in reversed(history):
+        board.undo(color, move, flips)
+        assert board.features == FeatureState(board.white, board.black)
+    assert (board.white, board.black) == (Board().white, Board().black)
+
+
+def test_copies_do_not_share_features():
+    board = Board()
+    board.track_features()
+    child = board.copy()
+    child.place(Color.black, bb.Position(2, 3))
+    assert board.features == FeatureState(board.white, board.black)
+    assert child.features.discs[Color.black] == 4
@@ -0,0 +1,33 @@
+from othelloai.ai import RandomAIPlayer
+from othelloai.board import Board
+from othelloai.color import Color
+from othelloai.game import Game
+
+
+class RecordingPlayer(RandomAIPlayer):
+    def __init__(self, color: Color):
+        super().__init__(color)
+        self.result = None
+
+    def _on_game_over(self, color, board):
+        self.result = (color, board)
+
+
+def test_game_over_when_neither_player_can_move():
+    board = Board(init_white=0x8000000000000000, init_black=0x0000000000000003)
+    black = RecordingPlayer(Color.black)
+    white = RecordingPlayer(Color.white)
+    game = Game(black, white, board)
+    game.loop()
+    assert black.result == (Color.black, board)
+    assert white.result == (Color.black, board)
+
+
+def test_game_plays_to_completion():
+    black = RecordingPlayer(Color.black)
+    white = RecordingPlayer(Color.white)
+    game = Game(black, white)
+    game.loop()
+    final = game.board
+    assert black.result[1] == final
+    assert not final.valid_moves()
@@ -0,0 +1,51 @@
+import threading
+
+from othelloai import bitboard as bb
+from othelloai.board import Board
+from othelloai.color import Color
+from othelloai.gui.updates import GameOver, UpdateQueue
+
+
+def test_board_changes_are_coalesced():
+    updates = UpdateQueue()
+    assert updates.drain() == (None, None)
+    first = Board()
+    second = first.copy()
+    second.place(Color.black, bb.Position(2, 3))
+    updates.post_board(first)
+    updates.post_board(second)
+    assert updates.drain() == (second, None)
+    assert updates.drain() == (None, None)
+
+
+def test_game_over_carries_final_board():
+    updates = UpdateQueue()
+    updates.post_board(Board())
+    final = Board(0, 0xFF)
+    updates.post_game_over(Color.black, final)
+    assert updates.drain() == (final, GameOver(Color.black, final))
+    updates.post_board(Board())
+    updates.clear()
+    assert updates.drain() == (None, None)
+
+
+def test_posts_from_another_thread():
+    updates = UpdateQueue()
+    boards = [Board(0, i) for i in range(1000)]
+
+    def post():
+        for board in boards:
+            updates.post_board(board)
+        updates.post_game_over(None, boards[-1])
+
+    poster = threading.Thread(target=post)
+    poster.start()
+    drained = []
+    game_over = None
+    while game_over is None:
+        board, game_over = updates.drain()
+        if board is not None:
+            drained.append(board.black)
+    poster.join()
+    assert drained == sorted(drained) and drained[-1] == 999
+    assert game_over == GameOver(None, boards[-1])
@@ -0,0 +1,92 @@
+import random
+
+from othelloai.bitboard import Position
+from othelloai.board import Board
+from othelloai.index import PositionIndex, canonical, position_hash
+from othelloai.record import format_moves, parse_moves, position_after
+
+
+def random_game(rng: random.Random) -> str:
+    board = Board()
+    moves = []
+    while not board.is_game_over():
+        if board.must_pass():
+            board.swap_turn_players()
+        move = rng.choice(board.valid_moves())
+        board.place(board.turn_player_color, move)
+        board.swap_turn_players()
+        moves.append(move)
+    return format_moves(moves)
+
+
+def test_symmetric_positions_share_a_hash():
+    # The four first moves lead to symmetric positions
+    boards = [position_after(parse_moves(m)) for m in ("f5", "d3", "c4", "e6")]
+    assert len({canonical(board) for board in boards}) == 1
+    assert len({position_hash(board) for board in boards}) == 1
+    assert position_hash(Board()) != position_hash(boards[0])
+
+
+def test_index_lookup_and_append(tmp_path):
+    rng = random.Random(3)
+    records = tmp_path / "games.txt"
+    games = [random_game(rng) for _ in range(6)]
+    records.write_text("# Random games\n" + "\n".join(games[:4]) + "\n")
+
+    with PositionIndex(tmp_path / "index") as index:
+        assert index.update([records]) == sum(len(g) // 2 + 1 for g in games[:4])
+        occurrences = index.lookup(Board())
+        assert len(occurrences) == 4
+        assert all(o.ply == 0 and o.path == records.resolve() for o in occurrences)
+        assert [o.next_move for o in occurrences] == [
+            parse_moves(game)[0] for game in games[:4]
+        ]
+
+    # Games are found in any orientation, with the next move reoriented
+    first = parse_moves(games[0])
+    board = position_after(first[:10])
+    mirrored = Board(
+        _mirror(board.white), _mirror(board.black), board.turn_player_color
+    )
+    with PositionIndex(tmp_path / "index") as index:
+        (occurrence, *_) = [o for o in index.lookup(mirrored) if o.offset == 15]
+        assert occurrence.ply == 10
+        assert occurrence.next_move == Position(first[10].row, 7 - first[10].col)
+        final = position_after(first)
+        assert occurrence.score == final.black.bit_count() - final.white.bit_count()
+
+        with open(records, "a") as f:
+            f.write("\n".join(games[4:]) + "\n")
+        index.update()
+        assert len(index.lookup(Board())) == 6
+        size = len(index)
+        index.compact()
+        assert len(index) == size
+        assert len(list((tmp_path / "index").glob("*.idx"))) == 1
+        assert len(index.lookup(Board())) == 6
+        assert index.lookup(position_after(parse_moves(games[5]))) != []
+
+
+def _mirror(bits: int) -> int:
+    res = 0
+    for r in range(8):
+        row = (bits >> (56 - 8 * r)) & 0xFF
+        res |= int(f"{row:08b}"[::-1], 2) << (56 - 8 * r)
+    return res
+
+
+def test_game_being_written_is_left_for_next_update(tmp_path):
+    rng = random.Random(5)
+    records = tmp_path / "games.txt"
+    games = [random_game(rng) for _ in range(2)]
+    # The second game is cut off mid-move, as if still being appended
+    half = len(games[1]) // 2 + 1
+    records.write_text(games[0] + "\n" + games[1][:half])
+
+    with PositionIndex(tmp_path / "index") as index:
+        assert index.update([records]) == len(games[0]) // 2 + 1
+        with open(records, "a") as f:
+            f.write(games[1][half:] + "\n")
+        assert index.update() == len(games[1]) // 2 + 1
+        assert len(index.lookup(Board())) == 2
+        assert index.lookup(position_after(parse_moves(games[1]))) != []
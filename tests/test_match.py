@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from othelloai.ai import AIOption
+from othelloai.match import SPRT, opening_transcripts, parse_engine, run_match
+
+
+def test_parse_engine():
+    assert parse_engine("Marty:depth=3,lmr=true,probcut=False") == (
+        AIOption.Marty,
+        dict(depth=3, lmr=True, probcut=False),
+    )
+    assert parse_engine("Randy") == (AIOption.Randy, {})
+    with pytest.raises(ValueError):
+        parse_engine("Marty:depth")
+    with pytest.raises(KeyError):
+        parse_engine("Nobody")
+
+
+def test_opening_transcripts():
+    assert opening_transcripts(1) == ["d3", "c4", "f5", "e6"]
+    assert len(opening_transcripts(2)) == 12
+
+
+def test_sprt_accepts_h1_for_dominant_engine():
+    sprt = SPRT(elo0=0, elo1=50)
+    while sprt.status() is None:
+        sprt.add_pair(2 if sprt.pairs % 4 else 1)
+    assert sprt.status() == "H1"
+    elo, margin = sprt.elo()
+    assert elo > 50 and margin > 0
+
+
+def test_sprt_accepts_h0_for_even_engines():
+    sprt = SPRT(elo0=0, elo1=50)
+    scores = [0, 2, 1, 1, 2, 0, 1]
+    while sprt.status() is None:
+        sprt.add_pair(scores[sprt.pairs % len(scores)])
+    assert sprt.status() == "H0"
+
+
+def test_run_match(tmp_path):
+    output = tmp_path / "match.jsonl"
+    sprt = SPRT()
+    run_match("Marty:depth=1", "Randy", ["f5d6"], output, sprt, workers=2, max_pairs=2)
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(lines) == sprt.pairs == 2
+    assert {game["color_a"] for game in lines[0]["games"]} == {"black", "white"}
+    assert lines[-1]["pairs"] == 2
+
+
+def test_sprt_accepts_h1_after_straight_wins():
+    sprt = SPRT(elo0=0, elo1=50)
+    for _ in range(10):
+        sprt.add_pair(2)
+    assert sprt.status() == "H1"
+
+
+def test_run_match_with_parallel_engine(tmp_path):
+    output = tmp_path / "match.jsonl"
+    sprt = SPRT()
+    run_match("Polly:depth=1,workers=1", "Randy", ["f5d6"], output, sprt, max_pairs=1)
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(lines) == sprt.pairs == 1
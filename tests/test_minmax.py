@@ -0,0 +1,113 @@
+import threading
+from math import inf
+
+import pytest
+
+from othelloai.ai.minmax import MinmaxAIPlayer
+from othelloai.ai.probcut import Cut, ProbCutParams
+from othelloai.board import Board
+from othelloai.color import Color, opposite_color
+from othelloai.record import parse_moves, replay
+
+
+def negamax(player: MinmaxAIPlayer, board: Board, depth: int) -> int:
+    """Reference full-width search without pruning."""
+    moves = board.valid_moves()
+    if not moves:
+        passed = board.copy()
+        passed.swap_turn_players()
+        if not passed.valid_moves():
+            return player._evaluate_state(board)
+        return -negamax(player, passed, depth)
+    if depth == 0:
+        return player._evaluate_state(board)
+    best = -inf
+    for move in moves:
+        child = board.copy()
+        child.place(child.turn_player_color, move)
+        child.swap_turn_players()
+        best = max(best, -negamax(player, child, depth - 1))
+    return best
+
+
+@pytest.fixture
+def midgame() -> Board:
+    (*_, board) = replay(parse_moves("f5d6c3d3c4f4f6f3e6e7"))
+    return board
+
+
+@pytest.mark.parametrize("depth", [1, 2, 3])
+def test_alpha_beta_matches_negamax(midgame, depth):
+    player = MinmaxAIPlayer(Color.black, depth)
+    assert player.search(midgame, depth) == negamax(player, midgame, depth)
+
+
+def test_best_move_score(midgame):
+    player = MinmaxAIPlayer(midgame.turn_player_color, 3)
+    score, move = player._find_best_move(midgame, 3)
+    assert move in midgame.valid_moves()
+    assert score == negamax(player, midgame, 3)
+
+
+def test_selective_search_visits_fewer_nodes(midgame):
+    params = ProbCutParams({3: [Cut(1, 1.0, 0.0, 1.0)], 4: [Cut(2, 1.0, 0.0, 1.0)]})
+    full = MinmaxAIPlayer(Color.black, 4)
+    full._find_best_move(midgame, 4)
+    for options in (dict(probcut=True), dict(lmr=True)):
+        selective = MinmaxAIPlayer(Color.black, 4, probcut_params=params, **options)
+        _, move = selective._find_best_move(midgame, 4)
+        assert move in midgame.valid_moves()
+        assert selective.nodes < full.nodes
+
+
+def test_probcut_params_round_trip(tmp_path):
+    params = ProbCutParams({5: [Cut(3, 1.1, -0.5, 4.0), Cut(1, 0.9, 0.2, 6.0)]}, 2.0)
+    path = tmp_path / "probcut.json"
+    params.save(path)
+    loaded = ProbCutParams.load(path)
+    assert loaded.threshold == 2.0
+    assert loaded.cuts_for(5) == [Cut(1, 0.9, 0.2, 6.0), Cut(3, 1.1, -0.5, 4.0)]
+    assert loaded.cuts_for(4) == []
+
+
+def test_ordering_visits_fewer_nodes(midgame):
+    unordered = MinmaxAIPlayer(Color.black, 4, ordering=False)
+    unordered_score, _ = unordered._find_best_move(midgame, 4)
+    ordered = MinmaxAIPlayer(Color.black, 4)
+    ordered_score, _ = ordered._find_best_move(midgame, 4)
+    assert ordered_score == unordered_score
+    assert ordered.nodes < unordered.nodes
+
+
+def test_table_can_be_disabled(midgame):
+    without = MinmaxAIPlayer(Color.black, 4, tt=False)
+    without_score, _ = without._find_best_move(midgame, 4)
+    with_table = MinmaxAIPlayer(Color.black, 4)
+    with_score, _ = with_table._find_best_move(midgame, 4)
+    assert without._table is None
+    assert without_score == with_score
+    assert with_table.nodes < without.nodes
+
+
+def test_tables_age_by_plies_played(midgame):
+    player = MinmaxAIPlayer(midgame.turn_player_color, 1)
+    advanced = []
+    player._orderer.advance = advanced.append
+    player.signal_turn_change(midgame.turn_player_color)
+    player.get_move(midgame, threading.Event())
+    # A move and a reply pass leave one fewer empty square but are two plies
+    player.signal_turn_change(opposite_color(midgame.turn_player_color))
+    player.signal_turn_change(midgame.turn_player_color)
+    player.get_move(midgame, threading.Event())
+    assert advanced == [2]
+
+
+def test_search_leaves_board_unchanged(midgame):
+    midgame.track_features()
+    before = midgame.copy()
+    player = MinmaxAIPlayer(Color.black, 4, max_nodes=500)
+    player._find_best_move(midgame, 4)
+    player.search(midgame, 2)
+    assert midgame == before
+    assert midgame.valid_moves() == before.valid_moves()
+    assert midgame.features == before.features
@@ -0,0 +1,77 @@
+import pytest
+
+from othelloai import bitboard as bb
+from othelloai.ai.minmax import MinmaxAIPlayer
+from othelloai.board import Board
+from othelloai.color import Color
+
+np = pytest.importorskip("numpy")
+
+from othelloai.ai.network import N_INPUTS, NetworkEvaluator, features  # noqa: E402
+
+
+def test_features_unpack_bitboards_from_a1():
+    board = Board(bb.pos_mask(0, 0), bb.pos_mask(7, 7), Color.white)
+    x = features([board])
+    assert x.shape == (1, N_INPUTS)
+    assert x[0, 0] == 1 and x[0, 127] == 1 and x[0, 128] == 1
+    assert x[0].sum() == 3
+
+
+def test_batches_match_single_evaluations(tmp_path):
+    network = NetworkEvaluator.random((16, 8), seed=1, batch_size=3)
+    boards = [Board()]
+    for move in Board().valid_moves():
+        child = Board()
+        child.place(Color.black, move)
+        child.swap_turn_players()
+        boards.append(child)
+    scores = network.evaluate(boards)
+    assert len(scores) == len(boards)
+    assert scores == pytest.approx([network.evaluate([b])[0] for b in boards])
+
+    network.save(tmp_path / "weights.npz")
+    loaded = NetworkEvaluator.load(tmp_path / "weights.npz", batch_size=64)
+    assert loaded.evaluate(boards) == pytest.approx(scores)
+    assert loaded.fingerprint() == network.fingerprint()
+    assert NetworkEvaluator.random((16, 8), seed=2).fingerprint() != (
+        network.fingerprint()
+    )
+
+
+@pytest.mark.parametrize(
+    "board",
+    [
+        Board(),
+        # Near the end some frontier children pass and others end the game
+        Board(0xFFCF5F5F0305077F, 0x30A0A0FC6A3800, Color.white),
+    ],
+)
+def test_network_search_matches_plain_evaluation(tmp_path, board):
+    path = tmp_path / "weights.npz"
+    network = NetworkEvaluator.random(seed=2)
+    network.save(path)
+    player = MinmaxAIPlayer(Color.black, 3, ordering=False, network=path)
+    score = player.search(board, 3)
+
+    def negamax(board, depth):
+        if board.is_game_over():
+            mine, theirs = board.white, board.black
+            if board.turn_player_color is Color.black:
+                mine, theirs = theirs, mine
+            return mine.bit_count() - theirs.bit_count()
+        if board.must_pass():
+            passed = board.copy()
+            passed.swap_turn_players()
+            return -negamax(passed, depth)
+        if depth == 0:
+            return network.evaluate([board])[0]
+        best = -np.inf
+        for move in board.valid_moves():
+            child = board.copy()
+            child.place(child.turn_player_color, move)
+            child.swap_turn_players()
+            best = max(best, -negamax(child, depth - 1))
+        return best
+
+    assert score == pytest.approx(negamax(board, 3), abs=1e-4)
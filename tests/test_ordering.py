@@ -0,0 +1,55 @@
+from othelloai import bitboard as bb
+from othelloai.ai.ordering import MoveOrderer
+from othelloai.ai.table import Bound, TranspositionTable
+from othelloai.board import Board
+from othelloai.color import Color
+
+
+def test_corners_first_and_c_squares_last():
+    board = Board(init_white=0x0060400000000000, init_black=0x0010200000000000)
+    moves = board.valid_moves()
+    ordered = MoveOrderer().order(board, moves, 0, 1)
+    assert ordered[0] == bb.Position(0, 0)
+    assert ordered[-1] == bb.Position(1, 0)
+
+
+def test_tt_move_and_killers_first():
+    board = Board()
+    moves = board.valid_moves()
+    orderer = MoveOrderer()
+    orderer.record_cutoff(Color.black, moves[1], 3, 2)
+    ordered = orderer.order(board, moves, 3, 2, moves[2])
+    assert ordered[:2] == [moves[2], moves[1]]
+    orderer.advance(2)
+    ordered = orderer.order(board, moves, 1, 2, moves[2])
+    assert ordered[:2] == [moves[2], moves[1]]
+
+
+def test_ordering_leaves_board_unchanged():
+    board = Board(init_white=0x0060400000000000, init_black=0x0010200000000000)
+    board.track_features()
+    before = board.copy()
+    ordered = MoveOrderer().order(board, board.valid_moves(), 0, 2)
+    assert sorted(ordered) == sorted(before.valid_moves())
+    assert board == before
+    assert board.features == before.features
+
+
+def test_table_keeps_deepest_entry():
+    table = TranspositionTable(max_entries=2)
+    board = Board()
+    table.store(board, 3, 5, Bound.exact, bb.Position(2, 3))
+    table.store(board, 2, 1, Bound.lower, bb.Position(3, 2))
+    assert table.get(board).depth == 3
+    table.store(board, 4, 0, Bound.upper, None)
+    assert table.get(board).score == 0
+
+
+def test_table_evicts_oldest_entry():
+    table = TranspositionTable(max_entries=2)
+    boards = [Board(), Board(0, 0), Board(1, 0)]
+    for board in boards:
+        table.store(board, 1, 0, Bound.exact, None)
+    assert len(table) == 2
+    assert table.get(boards[0]) is None
+    assert table.get(boards[2]) is not None
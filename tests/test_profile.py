@@ -0,0 +1,34 @@
+from othelloai.ai.minmax import INTERRUPT_CHECK_NODES, MinmaxAIPlayer
+from othelloai.bench.profile import PHASES, diff, phase_of, run_profile
+from othelloai.board import Board
+from othelloai.color import Color
+from othelloai.record import parse_moves, replay
+
+GAME = "f5d6c3d3c4f4f6f3e6e7d7g6"
+
+
+def test_node_limit_stops_search():
+    player = MinmaxAIPlayer(Color.black, 8, max_nodes=200)
+    _, move = player.analyze(Board(), 8)
+    assert move in Board().valid_moves()
+    assert player.nodes < 200 + INTERRUPT_CHECK_NODES
+
+
+def test_profiles_are_reproducible():
+    games = [[(board, 3) for board in replay(parse_moves(GAME))]]
+    first = run_profile("Marty", games, max_nodes=300, top=5)
+    second = run_profile("Marty", games, "sampling", max_nodes=300, top=5)
+    assert first["positions"] == len(games[0])
+    assert first["phases"]["opening"]["positions"] == len(games[0])
+    assert first["nodes"] == second["nodes"]
+    assert len(first["functions"]) == 5
+    functions = first["phases"]["opening"]["functions"]
+    assert any(f["function"].startswith("othelloai/") for f in functions)
+    lines = diff(first, second)
+    assert lines[0].split() == ["phase", "seconds", "nodes"]
+    assert [line.split()[0] for line in lines[1:5]] == [*PHASES, "total"]
+
+
+def test_phases():
+    assert phase_of(Board()) == "opening"
+    assert phase_of(Board(0xFFFFFFFF, 0xFFFF00000000)) == "endgame"
@@ -0,0 +1,32 @@
+import pytest
+
+from othelloai import bitboard as bb
+from othelloai.board import Board
+from othelloai.color import Color
+from othelloai.exception import IllegalMoveError
+from othelloai.record import format_moves, parse_move, parse_moves, replay
+
+
+def test_parse_move():
+    assert parse_move("a1") == bb.Position(0, 0)
+    assert parse_move("h8") == bb.Position(7, 7)
+    assert parse_move("F5") == bb.Position(4, 5)
+    with pytest.raises(ValueError):
+        parse_move("i1")
+
+
+def test_transcript_round_trip():
+    transcript = "f5d6c3d3c4"
+    assert format_moves(parse_moves(transcript)) == transcript
+
+
+def test_replay():
+    boards = list(replay(parse_moves("f5d6")))
+    assert boards[0] == Board()
+    assert boards[1].turn_player_color is Color.white
+    assert bb.Position(5, 3) in boards[1].valid_moves()
+
+
+def test_replay_illegal_move():
+    with pytest.raises(IllegalMoveError):
+        list(replay(parse_moves("a1")))
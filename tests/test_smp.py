@@ -0,0 +1,107 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from othelloai import bitboard as bb
+from othelloai.ai.minmax import MinmaxAIPlayer
+from othelloai.ai.smp import (
+    ParallelMinmaxAIPlayer,
+    SharedTranspositionTable,
+    _HelperSearch,
+)
+from othelloai.ai.table import Bound
+from othelloai.board import Board
+from othelloai.color import Color
+from othelloai.record import parse_moves, replay
+
+
+def _store(table_args):
+    table = SharedTranspositionTable(*table_args)
+    table.store(Board(), 4, -3, Bound.lower, bb.Position(2, 3))
+    table.close()
+
+
+def test_shared_table_across_processes():
+    context = multiprocessing.get_context("spawn")
+    table = SharedTranspositionTable(bits=8)
+    try:
+        process = context.Process(target=_store, args=(table.attach_args(),))
+        process.start()
+        process.join()
+        assert process.exitcode == 0
+        assert table.get(Board()) == (4, -3, Bound.lower, bb.Position(2, 3))
+        assert table.get(Board(0, 0)) is None
+    finally:
+        table.close()
+
+
+def test_shared_table_keeps_deepest_entry():
+    table = SharedTranspositionTable(bits=8)
+    try:
+        board = Board()
+        table.store(board, 3, 1, Bound.exact, None)
+        table.store(board, 2, 5, Bound.upper, bb.Position(3, 2))
+        assert table.get(board) == (3, 1, Bound.exact, None)
+        table.clear()
+        assert table.get(board) is None
+    finally:
+        table.close()
+
+
+def test_shared_table_rejects_torn_slots():
+    table = SharedTranspositionTable(bits=8)
+    try:
+        board = Board()
+        table.store(board, 3, -40, Bound.upper, bb.Position(2, 3))
+        assert table.get(board) == (3, -40, Bound.upper, bb.Position(2, 3))
+        # A write interrupted halfway leaves checks made for another result
+        buf = table._shm.buf
+        (offset,) = [i for i in range(0, len(buf), 24) if any(buf[i : i + 24])]
+        buf[offset + 16] ^= 1
+        assert table.get(board) is None
+    finally:
+        table.close()
+
+
+def test_shared_table_keeps_fractional_scores():
+    table = SharedTranspositionTable(bits=8)
+    try:
+        for score in (0.75, -0.75, -12.5):
+            table.store(Board(), 3, score, Bound.exact, None)
+            assert table.get(Board()).score == score
+    finally:
+        table.close()
+
+
+def test_helpers_diverge_after_the_best_move():
+    board = Board()
+    tt_move = bb.Position(4, 5)
+    orders = set()
+    for index in range(3):
+        helper = _HelperSearch(index)
+        ordered = helper._ordered(board, board.valid_moves(), 0, 3, tt_move)
+        assert ordered[0] == tt_move
+        orders.add(tuple(ordered))
+    assert len(orders) == 3
+
+
+@pytest.mark.parametrize(
+    "options", [dict(cache_path="cache.db"), dict(tt=False), dict(max_nodes=1000)]
+)
+def test_parallel_player_rejects_unsupported_options(options):
+    with pytest.raises(ValueError):
+        ParallelMinmaxAIPlayer(Color.black, 3, **options)
+
+
+def test_parallel_search_finds_best_score():
+    (*_, board) = replay(parse_moves("f5d6c3d3c4f4f6f3e6e7"))
+    player = ParallelMinmaxAIPlayer(board.turn_player_color, 3, workers=2)
+    move = player.get_move(board.copy(), threading.Event())
+
+    reference = MinmaxAIPlayer(board.turn_player_color, 3)
+    best_score, _ = reference._find_best_move(board, 3)
+    child = board.copy()
+    child.place(child.turn_player_color, move)
+    child.swap_turn_players()
+    assert -reference.search(child, 2) == best_score
@@ -0,0 +1,92 @@
+import json
+import pickle
+from math import inf
+
+from othelloai.ai import RandomAIPlayer
+from othelloai.color import Color
+from othelloai.game import Game
+from othelloai.telemetry import Histogram, Metrics, MetricsExporter
+
+
+def test_histogram_buckets_and_merge():
+    histogram = Histogram((0.1, 1.0, inf))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.quantile(0.5) == 0.1 and histogram.quantile(1.0) == inf
+    other = Histogram((0.1, 1.0, inf))
+    other.observe(0.5)
+    histogram.merge(other)
+    assert histogram.counts == [2, 2, 1] and histogram.count == 5
+    assert histogram.sum == 3.15
+
+
+def test_game_records_metrics():
+    metrics = Metrics()
+    black = RandomAIPlayer(Color.black)
+    white = RandomAIPlayer(Color.white)
+    game = Game(black, white, metrics=metrics)
+    game.loop()
+    final = game.board
+    moves = sum(metrics.counter("moves_total", player=c.name) for c in Color)
+    assert moves == final.white.bit_count() + final.black.bit_count() - 4
+    assert metrics.counter("games_total") == 1
+    assert metrics.histogram("move_seconds", player="black").count >= moves // 2
+    assert metrics.histogram("notify_seconds", event="board_change").count == moves + 1
+    assert metrics.histogram("game_seconds").count == 1
+    assert metrics.moves_per_second() > 0
+
+    merged = Metrics()
+    merged.merge(pickle.loads(pickle.dumps(metrics)))
+    merged.merge(metrics)
+    assert merged.counter("games_total") == 2
+
+
+def test_exporters(tmp_path):
+    metrics = Metrics()
+    metrics.observe("move_seconds", 0.002, player="white")
+    metrics.increment("passes_total", player="black")
+
+    with MetricsExporter(metrics, tmp_path / "metrics.jsonl", interval=60):
+        pass
+    (line,) = (tmp_path / "metrics.jsonl").read_text().splitlines()
+    snapshot = json.loads(line)
+    assert snapshot["counters"] == [
+        dict(name="passes_total", labels=dict(player="black"), value=1)
+    ]
+    assert snapshot["histograms"][0]["count"] == 1
+
+    exporter = MetricsExporter(metrics, tmp_path / "metrics.prom")
+    exporter.export()
+    text = (tmp_path / "metrics.prom").read_text()
+    assert 'othello_move_seconds_bucket{player="white",le="0.005"} 1' in text
+    assert 'othello_move_seconds_bucket{player="white",le="0.001"} 0' in text
+    assert 'othello_passes_total{player="black"} 1' in text
+    assert "othello_move_seconds_count" in text
+
+
+class _CheckingPlayer(RandomAIPlayer):
+    """Records the move rate of `metrics` on each of its moves."""
+
+    def __init__(self, color, metrics):
+        super().__init__(color)
+        self.metrics = metrics
+        self.rates = []
+
+    def _get_move(self, board, interrupt):
+        self.rates.append(self.metrics.moves_per_second())
+        return super()._get_move(board, interrupt)
+
+
+def test_moves_per_second_during_game():
+    metrics = Metrics()
+    black = _CheckingPlayer(Color.black, metrics)
+    game = Game(black, RandomAIPlayer(Color.white), metrics=metrics)
+    game.loop()
+    # No move has been made before black's first one
+    assert black.rates[0] == 0
+    assert all(rate > 0 for rate in black.rates[1:])
+
+    moves = sum(metrics.counter("moves_total", player=c.name) for c in Color)
+    game_seconds = metrics.histogram("game_seconds").sum
+    assert metrics.moves_per_second() == moves / game_seconds